@@ -0,0 +1,274 @@
+# bench.py — benchmark waktu & throughput + deteksi regresi
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import crypto_hybrid as ch
+
+DEFAULT_OUT = os.path.join("bench_out", "bench_results.json")
+DEFAULT_SIZES = "1M,16M,128M"
+QUICK_SIZES = "256K,4M"
+DEFAULT_CHUNKS = "64K,1M"
+MICRO_KEYWORD = "BALLOON"
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+IMPORT_MODULES = ("crypto_hybrid", "cli")
+IMPORT_TARGET_MS = 100 # Batas waktu import (cold start) per modul untuk --check-import
+UI_MODULES = ("streamlit",) # Tidak boleh ikut ter-import oleh modul inti/CLI
+
+def parse_size(text):
+    """'64K' -> 65536, '1M' -> 1048576, '123' -> 123."""
+    text = text.strip().upper()
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+def fmt_size(n):
+    for suffix in ("G", "M", "K"):
+        if n >= UNITS[suffix] and n % UNITS[suffix] == 0:
+            return f"{n // UNITS[suffix]}{suffix}"
+    return str(n)
+
+def make_input(directory, size):
+    """File acak berukuran `size`, ditulis per 1MB agar memori tetap kecil."""
+    path = os.path.join(directory, f"input_{size}.bin")
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            left = size
+            while left:
+                n = min(left, 1024 * 1024)
+                f.write(os.urandom(n))
+                left -= n
+    return path
+
+def time_call(fn, repeat):
+    """Jalankan fn `repeat` kali; kembalikan daftar durasi (detik)."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+def record(name, params, samples, nbytes=None, ops=1):
+    """Satu baris hasil. Metrik pembanding utama: median detik per operasi (lebih kecil = lebih baik)."""
+    median = statistics.median(samples) / ops
+    row = {
+        "name": name,
+        "params": params,
+        "key": " ".join([name] + [f"{k}={v}" for k, v in sorted(params.items())]),
+        "seconds": median,
+        "min_seconds": min(samples) / ops,
+        "repeat": len(samples),
+    }
+    if nbytes is not None:
+        row["mb_per_s"] = nbytes / (1024 * 1024) / median if median > 0 else None
+    else:
+        row["ops_per_s"] = 1 / median if median > 0 else None
+    return row
+
+# ---------- Benchmark file (encrypt_file_hybrid / decrypt_file_hybrid) ----------
+def bench_files(workdir, sizes, chunks, backends, versions, workers, repeat, keyword):
+    rows = []
+    for size in sizes:
+        src = make_input(workdir, size)
+        enc = os.path.join(workdir, "out.hybr")
+        dec = os.path.join(workdir, "out.dec")
+        for version in versions:
+            for chunk in chunks:
+                for backend in backends:
+                    # v1: chunk = ukuran I/O; v2: chunk = ukuran segmen (format)
+                    if version == ch.VERSION_V1:
+                        opts = {"version": version, "chunk_size": chunk}
+                        dec_opts = {"chunk_size": chunk}
+                    else:
+                        opts = {"version": version, "segment_size": chunk}
+                        dec_opts = {}
+                    params = {"size": fmt_size(size), "version": version, "chunk": fmt_size(chunk),
+                              "backend": backend, "workers": workers}
+                    samples = time_call(lambda: ch.encrypt_file_hybrid(
+                        src, enc, keyword, workers=workers, backend=backend, **opts), repeat)
+                    rows.append(record("file.encrypt", params, samples, nbytes=size))
+                    samples = time_call(lambda: ch.decrypt_file_hybrid(
+                        enc, dec, keyword, workers=workers, backend=backend, **dec_opts), repeat)
+                    rows.append(record("file.decrypt", params, samples, nbytes=size))
+                    label = " ".join(f"{k}={v}" for k, v in params.items())
+                    print(f"  {label}: enc {rows[-2]['mb_per_s']:.1f} MB/s, dec {rows[-1]['mb_per_s']:.1f} MB/s")
+        os.remove(src)
+    return rows
+
+# ---------- Microbenchmark (Myszkowski & header) ----------
+def bench_micro(keyword, repeat):
+    key_hex = os.urandom(32).hex()
+    wrapped = ch.myszkowski_encrypt(key_hex, keyword)
+    header = ch._build_header(ch.VERSION_V2, wrapped.encode("utf-8"), os.urandom(ch.AES_NONCE_LEN), ch.SEGMENT_SIZE)
+    cases = {
+        "micro.keyword_order": lambda: ch._keyword_order(keyword),
+        "micro.myszkowski_encrypt": lambda: ch.myszkowski_encrypt(key_hex, keyword),
+        "micro.myszkowski_decrypt": lambda: ch.myszkowski_decrypt(wrapped, keyword),
+        "micro.unwrap_key": lambda: ch._unwrap_key(wrapped.encode("utf-8"), keyword),
+        "micro.read_header": lambda: ch._read_header(io.BytesIO(header)),
+    }
+    rows = []
+    for name, fn in cases.items():
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        samples = timer.repeat(repeat=max(repeat, 3), number=number)
+        rows.append(record(name, {"keyword_len": len(keyword)}, samples, ops=number))
+        print(f"  {rows[-1]['key']}: {rows[-1]['seconds'] * 1e6:.2f} us/op")
+    return rows
+
+# ---------- Waktu import (cold start CLI & worker) ----------
+def import_time(module):
+    """
+    Import `module` di interpreter baru dengan -X importtime. Return (detik kumulatif,
+    modul UI yang ikut ter-import). Bytecode dikompilasi dulu agar yang diukur startup, bukan compile.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = (f"import sys, {module}\n"
+            f"print(','.join(m for m in {UI_MODULES!r} if m in sys.modules))")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=here,
+                          capture_output=True, text=True, check=True)
+    for line in proc.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1e6, [m for m in proc.stdout.strip().split(",") if m]
+    raise RuntimeError(f"importtime output for {module} not found")
+
+def bench_import(modules, repeat):
+    import compileall
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in modules:
+        compileall.compile_file(os.path.join(here, module + ".py"), quiet=1)
+    rows = []
+    for module in modules:
+        samples, ui = [], []
+        for _ in range(max(repeat, 3)):
+            seconds, ui = import_time(module)
+            samples.append(seconds)
+        row = record("import." + module, {}, samples)
+        row["ui_modules"] = ui
+        rows.append(row)
+        print(f"  {row['key']}: {row['seconds'] * 1000:.1f} ms" + (f" (imports {', '.join(ui)}!)" if ui else ""))
+    return rows
+
+def check_import(rows, target_ms):
+    """Daftar pelanggaran: modul yang melebihi target atau ikut meng-import modul UI."""
+    problems = []
+    for row in rows:
+        if row["seconds"] * 1000 > target_ms:
+            problems.append(f"{row['name']}: {row['seconds'] * 1000:.1f} ms > {target_ms} ms")
+        if row["ui_modules"]:
+            problems.append(f"{row['name']}: imports UI module(s) {', '.join(row['ui_modules'])}")
+    return problems
+
+# ---------- Perbandingan dengan baseline ----------
+def compare(baseline, current, threshold):
+    """Kembalikan daftar (key, base, now, rasio) yang lebih lambat dari baseline melebihi threshold."""
+    base_rows = {row["key"]: row for row in baseline["results"]}
+    regressions = []
+    print(f"{'benchmark':<72} {'base (s)':>11} {'now (s)':>11} {'change':>8}")
+    for row in current["results"]:
+        base = base_rows.get(row["key"])
+        if base is None:
+            continue
+        ratio = row["seconds"] / base["seconds"] if base["seconds"] > 0 else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append((row["key"], base["seconds"], row["seconds"], ratio))
+        print(f"{row['key']:<72} {base['seconds']:>11.4g} {row['seconds']:>11.4g} {ratio - 1:>+8.1%}{flag}")
+    return regressions
+
+def metadata():
+    try:
+        import Crypto
+        crypto_version = Crypto.__version__
+    except Exception:
+        crypto_version = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pycryptodome": crypto_version,
+    }
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark crypto_hybrid and compare against a saved baseline")
+    p.add_argument("--sizes", default=DEFAULT_SIZES, help=f"File sizes (default: {DEFAULT_SIZES})")
+    p.add_argument("--chunks", default=DEFAULT_CHUNKS, help="v1 chunk sizes / v2 segment sizes")
+    p.add_argument("--backends", default=",".join(ch.BACKENDS), help="I/O backends")
+    p.add_argument("--versions", default="1,2", help=".hybr format versions")
+    p.add_argument("--workers", type=int, default=1, help="Segment workers for v2 (default: 1)")
+    p.add_argument("--repeat", type=int, default=3, help="Repetitions per benchmark (median is reported)")
+    p.add_argument("--quick", action="store_true", help=f"Small sizes only ({QUICK_SIZES})")
+    p.add_argument("--micro-only", action="store_true", help="Only run microbenchmarks")
+    p.add_argument("--check-import", action="store_true",
+                   help="Only measure import time of the core module and CLI; fail if over --import-target "
+                        "or if they pull in Streamlit")
+    p.add_argument("--import-target", type=float, default=IMPORT_TARGET_MS,
+                   help=f"Import-time budget per module in ms (default: {IMPORT_TARGET_MS})")
+    p.add_argument("--workdir", default=None, help="Directory for temporary files (default: system temp)")
+    p.add_argument("--out", default=DEFAULT_OUT, help=f"Results JSON (default: {DEFAULT_OUT})")
+    p.add_argument("--compare", metavar="BASELINE", help="Compare results with a baseline JSON")
+    p.add_argument("--results", metavar="JSON", help="With --compare: compare this results file instead of running")
+    p.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging (default: 0.10)")
+    args = p.parse_args()
+
+    if args.check_import:
+        print("Import time:")
+        problems = check_import(bench_import(IMPORT_MODULES, args.repeat), args.import_target)
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+    if args.results:
+        if not args.compare:
+            p.error("--results requires --compare")
+        with open(args.results, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        sizes = [parse_size(s) for s in (QUICK_SIZES if args.quick else args.sizes).split(",")]
+        chunks = [parse_size(s) for s in args.chunks.split(",")]
+        backends = args.backends.split(",")
+        versions = [int(v) for v in args.versions.split(",")]
+        results = []
+        print("Microbenchmarks:")
+        results += bench_micro(MICRO_KEYWORD, args.repeat)
+        print("Import time:")
+        results += bench_import(IMPORT_MODULES, args.repeat)
+        if not args.micro_only:
+            print("File benchmarks:")
+            workdir = tempfile.mkdtemp(prefix="hybr_bench_", dir=args.workdir)
+            try:
+                results += bench_files(workdir, sizes, chunks, backends, versions,
+                                       args.workers, args.repeat, MICRO_KEYWORD)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        current = {"meta": metadata(), "results": results}
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Results -> {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+        print("No regressions.")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
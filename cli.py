@@ -1,24 +1,461 @@
 # cli.py
 import argparse
-from crypto_hybrid import encrypt_file_hybrid, decrypt_file_hybrid
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from crypto_hybrid import (encrypt_file_hybrid, decrypt_file_hybrid, encrypt_stream, decrypt_stream,
+                           append_file_hybrid, inspect_file, match_keyword, rekey_file, verify_file,
+                           APPEND_JOURNAL_SUFFIX, BACKENDS, COMPRESSION_CODECS, PHASES, VERSION_V1, VERSION_V2)
+
+def _open_stream(path, mode):
+    """'-' berarti stdin/stdout (biner); selain itu buka file biasa."""
+    if path == "-":
+        return sys.stdin.buffer if "r" in mode else sys.stdout.buffer
+    return open(path, mode)
+
+def _run_streaming(args):
+    fin = _open_stream(args.infile, "rb")
+    fout = _open_stream(args.outfile, "wb")
+    try:
+        if args.mode == "enc":
+            stats = encrypt_stream(fin, fout, args.key, workers=args.workers or 1, executor=args.executor,
+                                   compression=args.compress)
+        else:
+            stats = decrypt_stream(fin, fout, args.key, workers=args.workers or 1, executor=args.executor)
+        fout.flush()
+        return stats
+    finally:
+        for f in (fin, fout):
+            if f not in (sys.stdin.buffer, sys.stdout.buffer):
+                f.close()
+
+# ---------- Mode bulk (direktori / pola glob) ----------
+MANIFEST_NAME = ".hybr_manifest.jsonl"
+GLOB_CHARS = "*?["
+TEMP_SUFFIXES = (".part", ".tmp_decrypt", APPEND_JOURNAL_SUFFIX)  # File sementara milik tool ini
+
+def _is_bulk_input(path):
+    return os.path.isdir(path) or any(c in path for c in GLOB_CHARS)
+
+def _is_own_temp(path):
+    """File sementara tool ini (`<output>.part` dll.) hanya jika `<output>` juga ada di sebelahnya."""
+    for temp_suffix in TEMP_SUFFIXES:
+        if path.endswith(temp_suffix) and os.path.exists(path[:-len(temp_suffix)]):
+            return True
+    return False
+
+def _expand_inputs(pattern, suffix=None):
+    """
+    Daftar (path, path_relatif) dari direktori (rekursif) atau pola glob.
+    Path relatif dihitung dari direktori tanpa karakter glob, agar struktur
+    folder bisa direplikasi di direktori output. `suffix` menyaring nama file.
+    File input biasa yang kebetulan berakhiran .part tetap diproses.
+    """
+    if os.path.isdir(pattern):
+        base = pattern
+        paths = (os.path.join(root, name) for root, _, names in os.walk(pattern) for name in names)
+    else:
+        static = pattern[:min(pattern.find(c) for c in GLOB_CHARS if c in pattern)]
+        base = os.path.dirname(static) or "."
+        paths = glob.iglob(pattern, recursive=True)
+    found = []
+    for path in paths:
+        name = os.path.basename(path)
+        if not os.path.isfile(path) or name == MANIFEST_NAME or _is_own_temp(path):
+            continue
+        if suffix and not name.endswith(suffix):
+            continue
+        found.append((path, os.path.relpath(path, base)))
+    return sorted(found, key=lambda item: item[1])
+
+def _bulk_output_name(mode, rel):
+    if mode == "enc":
+        return rel + ".hybr"
+    if rel.endswith(".hybr"):
+        return rel[:-len(".hybr")]
+    return rel + ".decrypted"
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _job_options(mode, version, compression):
+    """Opsi yang menentukan isi output; disimpan di manifest agar --resume tidak salah melewati file."""
+    if mode != "enc":
+        return {"format": None, "compress": None} # Hasil dekripsi tidak bergantung pada opsi ini
+    return {"format": version, "compress": compression}
+
+def _process_one(mode, src, dst, key, version, workers, backend, compression=None):
+    """Satu job bulk (dijalankan di worker process). Output ditulis atomik via .part lalu rename."""
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    st = os.stat(src)
+    part = dst + ".part"
+    t0 = time.perf_counter()
+    try:
+        if mode == "enc":
+            stats = encrypt_file_hybrid(src, part, key, version=version, workers=workers, backend=backend,
+                                        compression=compression)
+        else:
+            stats = decrypt_file_hybrid(src, part, key, workers=workers, backend=backend)
+        os.replace(part, dst)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    seconds = time.perf_counter() - t0
+    return {
+        "mode": mode, "src": src, "dst": dst,
+        **_job_options(mode, version, compression),
+        "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+        "out_size": os.path.getsize(dst), "seconds": round(seconds, 4),
+        "phases": stats.as_dict()["phases"],
+        "sha256": _sha256_file(dst),
+    }
+
+def _load_manifest(path):
+    """Entri selesai dari run sebelumnya, dikunci per path input."""
+    done = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue # Baris terakhir bisa terpotong jika run sebelumnya diinterupsi
+                done[(entry["mode"], entry["src"])] = entry
+    except FileNotFoundError:
+        pass
+    return done
+
+def _already_done(entry, src, dst, options):
+    if entry is None or not os.path.exists(dst):
+        return False
+    # Entri lama tanpa format/compress dianggap berbeda, jadi file diproses ulang
+    if any(entry.get(name) != value for name, value in options.items()):
+        return False
+    st = os.stat(src)
+    return (entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+            and entry["out_size"] == os.path.getsize(dst))
+
+def _run_bulk(args):
+    # Import di sini agar mode file tunggal/streaming tidak membayar biaya import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    inputs = _expand_inputs(args.infile, ".hybr" if args.mode == "dec" and os.path.isdir(args.infile) else None)
+    os.makedirs(args.outfile, exist_ok=True)
+    manifest_path = args.manifest or os.path.join(args.outfile, MANIFEST_NAME)
+    done = _load_manifest(manifest_path)
+
+    options = _job_options(args.mode, args.format, args.compress)
+    jobs = []
+    skipped = 0
+    out_root = os.path.abspath(args.outfile) + os.sep
+    for src, rel in inputs:
+        src = os.path.abspath(src)
+        if src.startswith(out_root):
+            continue # Jangan memproses ulang output jika direktori output ada di dalam input
+        dst = os.path.abspath(os.path.join(args.outfile, _bulk_output_name(args.mode, rel)))
+        if _already_done(done.get((args.mode, src)), src, dst, options):
+            skipped += 1
+        else:
+            jobs.append((src, dst))
+
+    print(f"{len(inputs)} file(s): {skipped} already done, {len(jobs)} to process")
+    failed = 0
+    total_bytes = 0
+    phase_totals = dict.fromkeys(PHASES, 0.0)
+    t0 = time.perf_counter()
+    # Satu file = satu job; paralelisme antar file, jadi segmen per file default 1 worker
+    workers = args.workers or 1
+    with open(manifest_path, "a", encoding="utf-8") as manifest, \
+            ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {
+            pool.submit(_process_one, args.mode, src, dst, args.key, args.format, workers, args.backend,
+                        args.compress): src
+            for src, dst in jobs
+        }
+        for future in as_completed(futures):
+            src = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Error: {src}: {e}", file=sys.stderr)
+                continue
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            total_bytes += entry["size"]
+            for name, sec in entry["phases"].items():
+                phase_totals[name] += sec
+            print(f"{'Encrypted' if args.mode == 'enc' else 'Decrypted'} -> {entry['dst']} ({entry['seconds']:.2f}s)")
+
+    elapsed = time.perf_counter() - t0
+    rate = total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0
+    print(f"Done: {len(jobs) - failed} ok, {failed} failed, {skipped} skipped in {elapsed:.2f}s ({rate:.2f} MB/s)")
+    if args.stats:
+        # Jumlah waktu per fase dari semua job (bisa melebihi waktu total karena job berjalan paralel)
+        print("Stats: " + " | ".join(f"{name} {sec:.3f}s" for name, sec in phase_totals.items()))
+    if failed:
+        sys.exit(1)
+
+# ---------- Inspect (header saja) ----------
+def _inspect_one(path, key):
+    try:
+        return inspect_file(path, key)
+    except (OSError, ValueError) as e:
+        return {"path": path, "error": str(e)}
+
+def _format_inspect(info):
+    if "error" in info:
+        return f"{info['path']}: error: {info['error']}"
+    parts = [f"v{info['version']}", f"{info['file_size']} bytes"]
+    if info["plaintext_size"] is None:
+        parts.append("truncated or corrupt")
+    elif info["compression"]:
+        parts.append(f"compressed plaintext {info['plaintext_size']} bytes")
+    else:
+        parts.append(f"plaintext {info['plaintext_size']} bytes")
+    if info["segments"] is not None:
+        parts.append(f"{info['segments']} segment(s) of {info['segment_size']}")
+    parts.append("key check" if info["key_check"] else "no key check")
+    if info["appendable"]:
+        parts.append("appendable")
+    if info["compression"]:
+        parts.append(f"{info['compression']} compression")
+    if info["keyword"]:
+        parts.append(f"keyword {info['keyword']}")
+    return f"{info['path']}: " + ", ".join(parts)
+
+def _run_inspect(args):
+    """Baca header saja (tanpa payload) untuk satu file, direktori, atau pola glob."""
+    if _is_bulk_input(args.infile):
+        paths = [path for path, _ in _expand_inputs(args.infile, ".hybr" if os.path.isdir(args.infile) else None)]
+    else:
+        paths = [args.infile]
+    # Header kecil dan I/O-bound: thread cukup, dan urutan output mengikuti urutan path
+    from concurrent.futures import ThreadPoolExecutor
+    bad = 0
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        for info in pool.map(lambda path: _inspect_one(path, args.key), paths):
+            if "error" in info or info["keyword"] == "mismatch" or info["plaintext_size"] is None:
+                bad += 1
+            print(json.dumps(info) if args.json else _format_inspect(info))
+    if bad:
+        sys.exit(1)
+
+# ---------- Verify (cek integritas tanpa menulis output) ----------
+def _verify_one(path, key, workers):
+    """Satu job verify (di worker process). Return statistik dalam bentuk dict."""
+    stats = verify_file(path, key, workers=workers)
+    return stats.as_dict()
+
+def _run_verify(args):
+    if _is_bulk_input(args.infile):
+        paths = [path for path, _ in _expand_inputs(args.infile, ".hybr" if os.path.isdir(args.infile) else None)]
+    else:
+        paths = [args.infile]
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    failed = 0
+    total_bytes = 0
+    phase_totals = dict.fromkeys(PHASES, 0.0)
+    t0 = time.perf_counter()
+    # Paralelisme antar file; segmen per file default 1 worker (sama seperti mode bulk)
+    workers = args.workers or 1
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(_verify_one, path, args.key, workers): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except (OSError, ValueError) as e:
+                failed += 1
+                print(f"FAILED {path}: {e}", file=sys.stderr)
+                continue
+            total_bytes += result["done_bytes"]
+            for name, sec in result["phases"].items():
+                phase_totals[name] += sec
+            print(f"OK {path} ({result['elapsed']:.2f}s)")
+
+    elapsed = time.perf_counter() - t0
+    rate = total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0
+    print(f"Done: {len(paths) - failed} ok, {failed} failed in {elapsed:.2f}s ({rate:.2f} MB/s)")
+    if args.stats:
+        print("Stats: " + " | ".join(f"{name} {sec:.3f}s" for name, sec in phase_totals.items()))
+    if failed:
+        sys.exit(1)
+
+# ---------- Rekey (ganti keyword, payload tidak dienkripsi ulang) ----------
+def _rekey_one(src, dst, old_key, new_key, verify):
+    """Return 'rekeyed' atau 'skipped' (file in-place yang sudah memakai keyword baru)."""
+    if dst is None:
+        # Run ulang setelah interupsi: deteksi keyword yang cocok secara read-only (header/KCV,
+        # atau satu kali baca payload untuk kedua keyword jika file tanpa KCV), baru menulis
+        if match_keyword(src, [old_key, new_key], verify=verify) == 1:
+            return "skipped"
+        rekey_file(src, old_key, new_key, verify=False) # Keyword lama sudah diverifikasi di atas
+        return "rekeyed"
+    rekey_file(src, old_key, new_key, out_path=dst, verify=verify)
+    return "rekeyed"
+
+def _run_rekey(args):
+    if _is_bulk_input(args.infile):
+        inputs = _expand_inputs(args.infile, ".hybr" if os.path.isdir(args.infile) else None)
+        jobs = [(src, os.path.join(args.outfile, rel) if args.outfile else None) for src, rel in inputs]
+    else:
+        jobs = [(args.infile, args.outfile)]
+    for _, dst in jobs:
+        if dst:
+            os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+
+    # Rekey hampir seluruhnya I/O header (v1 tanpa --no-verify membaca seluruh payload)
+    from concurrent.futures import ThreadPoolExecutor
+    counts = {"rekeyed": 0, "skipped": 0, "failed": 0}
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [(src, dst, pool.submit(_rekey_one, src, dst, args.key, args.new_key, not args.no_verify))
+                   for src, dst in jobs]
+        for src, dst, future in futures:
+            try:
+                status = future.result()
+            except (OSError, ValueError) as e:
+                counts["failed"] += 1
+                print(f"Error: {src}: {e}", file=sys.stderr)
+                continue
+            counts[status] += 1
+            if status == "rekeyed":
+                print(f"Rekeyed -> {dst or src}")
+    elapsed = time.perf_counter() - t0
+    print(f"Done: {counts['rekeyed']} rekeyed, {counts['skipped']} already rekeyed, "
+          f"{counts['failed']} failed in {elapsed:.2f}s")
+    if counts["failed"]:
+        sys.exit(1)
 
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("mode", choices=["enc","dec"])
-    p.add_argument("infile")
-    p.add_argument("outfile")
-    p.add_argument("--key", required=True, help="Keyword for Myszkowski (string)")
+    p.add_argument("mode", choices=["enc","dec","inspect","rekey","verify"],
+                   help="enc/dec; inspect: read .hybr headers only and report format, sizes and keyword match; "
+                        "rekey: change the keyword by rewriting headers only; "
+                        "verify: authenticate every GCM tag without writing any output")
+    p.add_argument("infile", help="Input path, directory, glob pattern, or - for stdin")
+    p.add_argument("outfile", nargs="?",
+                   help="Output path (output directory for bulk input), or - for stdout; not used by inspect "
+                        "and verify; optional for rekey (default: rewrite headers in place)")
+    p.add_argument("--key", help="Keyword for Myszkowski (string); required for enc/dec/verify/rekey "
+                                 "(old keyword for rekey), optional for inspect")
+    p.add_argument("--new-key", help="rekey: new keyword")
+    p.add_argument("--no-verify", action="store_true",
+                   help="rekey: skip the payload check for files without a key check value "
+                        "(v1 files otherwise read their whole payload once). Only use when --key is known "
+                        "to be right for every file: a wrong key would be re-wrapped and the file lost")
+    p.add_argument("--format", type=int, choices=[VERSION_V1, VERSION_V2], default=VERSION_V2,
+                   help=".hybr format version to write (enc only; 2 = segmented, parallel)")
+    p.add_argument("--workers", type=int, default=None, help="Parallel workers for v2 segments (default: all cores)")
+    p.add_argument("--executor", choices=["thread","process"], default="thread", help="Worker pool type")
+    p.add_argument("--backend", choices=BACKENDS, default="buffered", help="I/O backend for local files")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                   help="Files processed concurrently (bulk mode, inspect, verify, rekey)")
+    p.add_argument("--manifest", default=None,
+                   help=f"Resume manifest for bulk mode (default: <outfile>/{MANIFEST_NAME})")
+    p.add_argument("--stats", action="store_true",
+                   help="Print bytes processed and time spent per phase (read, crypt, write, verify, rename)")
+    p.add_argument("--json", action="store_true", help="inspect: print one JSON object per file")
+    p.add_argument("--compress", choices=COMPRESSION_CODECS, default=None,
+                   help="enc: compress the plaintext before encryption (format 2); files whose sample "
+                        "does not shrink, e.g. MP4 or ZIP, are stored uncompressed")
+    p.add_argument("--append", action="store_true",
+                   help="enc: append the input bytes written since the last run to an appendable .hybr "
+                        "(created if missing), for recordings that are still growing; only the last "
+                        "segment is rewritten")
     args = p.parse_args()
-    
+
+    if args.mode == "inspect":
+        if args.outfile is not None:
+            p.error("inspect takes no output path")
+        _run_inspect(args)
+        return
+    if args.mode == "verify":
+        if args.outfile is not None:
+            p.error("verify takes no output path")
+        if not args.key:
+            p.error("the following arguments are required: --key")
+        _run_verify(args)
+        return
+    if args.mode == "rekey":
+        if not args.key or not args.new_key:
+            p.error("rekey requires --key (old keyword) and --new-key")
+        if "-" in (args.infile, args.outfile):
+            p.error("rekey works on files, not stdin/stdout")
+        _run_rekey(args)
+        return
+    if args.outfile is None:
+        p.error("the following arguments are required: outfile")
+    if not args.key:
+        p.error("the following arguments are required: --key")
+
+    if args.append:
+        if args.mode != "enc":
+            p.error("--append only applies to enc")
+        if "-" in (args.infile, args.outfile) or _is_bulk_input(args.infile):
+            p.error("--append works on a single input file and .hybr file")
+        if args.format != VERSION_V2:
+            p.error("--append requires --format 2")
+        if args.compress:
+            p.error("--append cannot be combined with --compress")
+        try:
+            stats = append_file_hybrid(args.infile, args.outfile, args.key)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        # Byte terenkripsi termasuk sisa segmen terakhir yang ditulis ulang
+        print(f"Appended -> {args.outfile} ({stats.done_bytes} bytes encrypted)")
+        if args.stats:
+            print("Stats:", stats.summary())
+        return
+
+    if args.compress and (args.mode != "enc" or args.format != VERSION_V2):
+        p.error("--compress only applies to enc with --format 2")
+
+    if args.infile != "-" and _is_bulk_input(args.infile):
+        if args.outfile == "-":
+            p.error("bulk input needs an output directory, not -")
+        _run_bulk(args)
+        return
+
+    # Pesan status ke stderr jika stdout dipakai untuk data
+    log = sys.stderr if args.outfile == "-" else sys.stdout
+    streaming = "-" in (args.infile, args.outfile)
+    if streaming and args.format != VERSION_V2:
+        p.error("streaming (-) requires --format 2")
+    if streaming and args.backend != "buffered":
+        p.error("streaming (-) only supports --backend buffered")
+
     if args.mode == "enc":
-        encrypt_file_hybrid(args.infile, args.outfile, args.key)
-        print("Encrypted ->", args.outfile)
+        if streaming:
+            stats = _run_streaming(args)
+        else:
+            stats = encrypt_file_hybrid(args.infile, args.outfile, args.key, version=args.format,
+                                        workers=args.workers, executor=args.executor, backend=args.backend,
+                                        compression=args.compress)
+        print("Encrypted ->", args.outfile, file=log)
     else:
         try:
-            decrypt_file_hybrid(args.infile, args.outfile, args.key)
-            print("Decrypted ->", args.outfile)
+            if streaming:
+                stats = _run_streaming(args)
+            else:
+                stats = decrypt_file_hybrid(args.infile, args.outfile, args.key,
+                                            workers=args.workers, executor=args.executor, backend=args.backend)
+            print("Decrypted ->", args.outfile, file=log)
         except Exception as e:
-            print(f"Error: {e}")
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    if args.stats:
+        print("Stats:", stats.summary(), file=log)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
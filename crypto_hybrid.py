@@ -1,13 +1,49 @@
 # crypto_hybrid.py (Versi Final Lengkap)
+#
+# Modul inti sengaja bebas UI dan cepat di-import (dipakai CLI & ribuan worker
+# berumur pendek): tidak ada import Streamlit, dan modul berat (concurrent.futures,
+# traceback) baru di-import saat dibutuhkan. Diagnostik dikirim lewat logger
+# "crypto_hybrid" dan observer (lihat add_observer).
+import errno
+import io
 import os
-import streamlit as st # <-- Import Streamlit untuk debugging
-import re              # <-- Import Regex untuk debugging & validasi
+import mmap
+import stat
+import sys
+import time
+from collections import deque, namedtuple
+from functools import lru_cache
+from operator import itemgetter
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 
 # ---------- Konstanta ----------
-CHUNK = 64 * 1024  # 64KB, ukuran chunk untuk pemrosesan file
+CHUNK = 64 * 1024  # 64KB, ukuran chunk minimum untuk pemrosesan file
+MAX_CHUNK = 4 * 1024 * 1024  # Batas atas chunk otomatis (4MB)
 AES_TAG_LEN = 16   # Ukuran tag otentikasi GCM (16 byte)
+AES_NONCE_LEN = 12 # Ukuran nonce GCM standar (12 byte)
+MAGIC = b'HYBR'    # Magic number file .hybr
+VERSION_V1 = 1     # Satu stream AES-GCM, satu tag di akhir file
+VERSION_V2 = 2     # Payload dibagi menjadi segmen, masing-masing dengan nonce & tag sendiri
+SEGMENT_SIZE = 1024 * 1024          # 1MB plaintext per segmen (default v2)
+MAX_SEGMENT_SIZE = 64 * 1024 * 1024 # Batas atas ukuran segmen
+FLAG_KEYCHECK = 0x01 # v2: header memuat key check value (KCV) setelah byte flags
+FLAG_APPEND = 0x02   # v2: file appendable, nonce segmen terakhir diikat ke panjang plaintext-nya
+FLAG_CODEC_SHIFT = 2 # v2: bit 2-3 flags = codec kompresi plaintext (0 = tanpa kompresi)
+FLAG_CODEC_MASK = 0x03 << FLAG_CODEC_SHIFT
+KNOWN_FLAGS = FLAG_KEYCHECK | FLAG_APPEND | FLAG_CODEC_MASK
+COMPRESSION_CODECS = ("zlib", "lzma", "bz2") # Codec stdlib; id di header = indeks + 1
+COMPRESS_SAMPLE = 64 * 1024   # Byte per titik sampel untuk memutuskan kompresi
+COMPRESS_SAMPLES = 4          # Jumlah titik sampel yang tersebar di file (stream: hanya awal)
+COMPRESS_MAX_RATIO = 0.9      # Kompresi dilewati jika sampel tidak menyusut minimal 10%
+KEYCHECK_LEN = 16    # Panjang KCV (HMAC-SHA256 terpotong)
+KEYCHECK_LABEL = b'HYBR keycheck v1' # Pemisah domain HMAC untuk KCV
+BACKENDS = ("buffered", "mmap", "pipelined") # Backend I/O untuk file lokal
+PIPELINE_DEPTH = 4 # Jumlah buffer yang berputar di backend pipelined (reader -> crypto -> writer)
+PHASES = ("read", "crypt", "write", "verify", "rename") # Fase yang diukur HybridStats
+PROGRESS_INTERVAL = 0.1 # Jeda minimum antar callback progress (detik)
+KEYWORD_CACHE_SIZE = 256 # Jumlah permutasi (pola peringkat, panjang) Myszkowski yang di-cache
+APPEND_JOURNAL_SUFFIX = ".append-journal" # Penanda append yang sedang berjalan (lihat append_file_hybrid)
 
 # ---------- Fungsi Helper Myszkowski ----------
 def _keyword_order(keyword: str):
@@ -22,6 +58,31 @@ def _keyword_order(keyword: str):
     return [rank_map[c] for c in chars]
 
 # ---------- Fungsi Myszkowski Cipher (Definisi SEBELUM digunakan) ----------
+# Transposisi Myszkowski hanya memindahkan posisi karakter, sehingga untuk satu
+# (pola peringkat keyword, panjang teks) hasilnya selalu permutasi indeks yang sama.
+# Permutasi itu "dikompilasi" sekali (di-cache, LRU) lalu diterapkan sebagai satu
+# gather itemgetter, tanpa membangun grid setiap kali. Hasilnya identik dengan
+# pembacaan grid klasik. Cache dikunci pada pola peringkat, bukan keyword itu
+# sendiri, agar keyword (rahasia) tidak tersimpan di memori proses.
+@lru_cache(maxsize=KEYWORD_CACHE_SIZE)
+def _compile_keyword(ranks: tuple, length: int):
+    """
+    Return (gather_encrypt, gather_decrypt) untuk teks sepanjang `length`.
+    Grid diisi baris per baris (`len(ranks)` kolom, baris terakhir boleh tidak penuh);
+    enkripsi membaca kolom per kolom menurut (peringkat keyword, indeks kolom).
+    """
+    cols = len(ranks)
+    # Urutkan indeks kolom berdasarkan (peringkat, lalu indeks asli)
+    idxs_sorted = sorted(range(cols), key=lambda i: (ranks[i], i))
+    # Posisi plaintext yang dibaca berurutan saat enkripsi (sel padding tidak pernah dibaca)
+    perm = [pos for col in idxs_sorted for pos in range(col, length, cols)]
+    inverse = [0] * length
+    for out_pos, pos in enumerate(perm):
+        inverse[pos] = out_pos
+    if length < 2: # itemgetter dengan <2 indeks tidak mengembalikan tuple; permutasinya identitas
+        return None, None
+    return itemgetter(*perm), itemgetter(*inverse)
+
 def myszkowski_encrypt(plaintext: str, keyword: str) -> str:
     """
     Mengenkripsi string (plaintext) menggunakan metode transposisi Myszkowski.
@@ -29,248 +90,963 @@ def myszkowski_encrypt(plaintext: str, keyword: str) -> str:
     """
     if not keyword:
         raise ValueError("Keyword diperlukan untuk Myszkowski")
+    # Karakter null dipakai sebagai padding pada grid klasik dan tidak pernah ikut ke output
+    plaintext = plaintext.replace('\0', '')
+    gather, _ = _compile_keyword(tuple(_keyword_order(keyword)), len(plaintext))
+    return ''.join(gather(plaintext)) if gather else plaintext
 
-    cols = len(keyword) # Jumlah kolom = panjang keyword
-    # Membuat grid (daftar baris), plaintext diisi baris per baris
-    rows = []
-    for i in range(0, len(plaintext), cols):
-        # Tambahkan padding karakter null ('\0') di akhir baris terakhir jika perlu
-        rows.append(list(plaintext[i:i + cols].ljust(cols, '\0')))
+def myszkowski_decrypt(ciphertext: str, keyword: str) -> str:
+    """
+    Mendekripsi ciphertext Myszkowski. Panjang plaintext sama dengan panjang
+    ciphertext (transposisi tidak menambah/mengurangi karakter), sehingga tidak
+    bergantung pada panjang kunci AES.
+    """
+    if not keyword:
+        raise ValueError("Keyword diperlukan untuk Myszkowski")
+    if '\0' in ciphertext:
+        raise ValueError("Dekripsi Myszkowski gagal: ciphertext berisi karakter padding. Keyword kemungkinan salah atau file rusak.")
+    _, gather = _compile_keyword(tuple(_keyword_order(keyword)), len(ciphertext))
+    return ''.join(gather(ciphertext)) if gather else ciphertext
 
-    ranks = _keyword_order(keyword) # Dapatkan peringkat untuk setiap kolom
+# ---------- Diagnostik (logging & observer) ----------
+_observers = []
 
-    # Dapatkan indeks kolom (0, 1, ..., cols-1)
-    idxs = list(range(cols))
-    # Urutkan indeks kolom berdasarkan (peringkat, lalu indeks asli)
-    # Ini menentukan urutan pembacaan kolom sesuai aturan Myszkowski
-    idxs_sorted = sorted(idxs, key=lambda i: (ranks[i], i))
+def add_observer(callback):
+    """
+    Daftarkan `callback(event, info)` untuk menerima event diagnostik dari modul ini
+    (mis. 'key_unwrapped' dengan info {'length', 'valid'}). Dipanggil di thread yang
+    menjalankan operasi; dipakai streamlit_app.py untuk menampilkan peringatan di UI.
+    """
+    if callback not in _observers:
+        _observers.append(callback)
 
-    # Baca grid kolom per kolom sesuai urutan idxs_sorted
-    result_chars = []
-    for col in idxs_sorted:
-        for r in range(len(rows)):
-            ch = rows[r][col]
-            # Hanya tambahkan karakter asli, abaikan padding null
-            if ch != '\0':
-                result_chars.append(ch)
+def remove_observer(callback):
+    if callback in _observers:
+        _observers.remove(callback)
 
-    return ''.join(result_chars) # Gabungkan karakter menjadi ciphertext
+def _notify(event: str, message: str, **info):
+    """
+    Kirim event ke observer dan ke logger "crypto_hybrid" (level DEBUG).
+    Modul logging tidak di-import di sini: jika aplikasi belum meng-import-nya,
+    belum ada handler yang bisa menampilkan pesan, jadi pesan aman dilewati.
+    """
+    logging = sys.modules.get("logging")
+    if logging is not None:
+        logging.getLogger(__name__).debug(message)
+    for callback in list(_observers):
+        callback(event, info)
 
-def myszkowski_decrypt(ciphertext: str, keyword: str) -> str:
+# ---------- Statistik & Progress ----------
+class HybridStats:
+    """
+    Statistik satu operasi enkripsi/dekripsi: byte plaintext yang sudah diproses
+    dan waktu (detik) per fase. Fase 'crypt' adalah AES-GCM termasuk waktu
+    menunggu worker pool; pada backend mmap I/O terjadi lewat page fault sehingga
+    ikut terhitung di 'crypt'. Pada backend pipelined fase berjalan bersamaan,
+    sehingga jumlah waktu fase bisa melebihi `elapsed`. Kompresi terhitung di 'read'
+    (enkripsi) dan dekompresi di 'write'; saat dekripsi file terkompresi, byte yang
+    dihitung adalah stream terkompresi. `callback(stats)` dipanggil paling sering
+    tiap PROGRESS_INTERVAL detik, dan sekali lagi saat operasi selesai.
+    """
+
+    def __init__(self, total_bytes: int = None, callback=None):
+        self.total_bytes = total_bytes
+        self.callback = callback
+        self.done_bytes = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.started = time.perf_counter()
+        self.finished = None
+        self._last_report = 0.0
+
+    def __repr__(self):
+        return (f"HybridStats(total_bytes={self.total_bytes}, done_bytes={self.done_bytes}, "
+                f"elapsed={self.elapsed:.3f}, phases={self.phases})")
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def fraction(self) -> float:
+        """Progress 0..1, atau None jika ukuran total tidak diketahui (stream)."""
+        if self.total_bytes is None:
+            return None
+        if self.total_bytes == 0:
+            return 1.0 if self.finished else 0.0
+        return min(1.0, self.done_bytes / self.total_bytes)
+
+    @property
+    def throughput(self) -> float:
+        """MB/s plaintext sejauh ini."""
+        elapsed = self.elapsed
+        return self.done_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] += seconds
+
+    def advance(self, nbytes: int):
+        self.done_bytes += nbytes
+        if self.callback is not None:
+            now = time.perf_counter()
+            if now - self._last_report >= PROGRESS_INTERVAL:
+                self._last_report = now
+                self.callback(self)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        if self.callback is not None:
+            self.callback(self)
+
+    def as_dict(self) -> dict:
+        return {
+            "total_bytes": self.total_bytes,
+            "done_bytes": self.done_bytes,
+            "elapsed": round(self.elapsed, 6),
+            "phases": {name: round(sec, 6) for name, sec in self.phases.items()},
+        }
+
+    def summary(self) -> str:
+        """Ringkasan satu baris, mis. untuk `cli.py --stats`."""
+        phases = " | ".join(f"{name} {sec:.3f}s" for name, sec in self.phases.items())
+        return (f"{phases} | {self.done_bytes / (1024 * 1024):.1f} MB in {self.elapsed:.3f}s "
+                f"({self.throughput:.1f} MB/s)")
+
+# ---------- Format File .hybr ----------
+# Isi header file .hybr yang sudah diparsing:
+#   version, key_cipher_bytes (kunci AES ter-wrap Myszkowski, UTF-8),
+#   nonce (nonce v1, atau nonce dasar segmen untuk v2),
+#   segment_size (ukuran plaintext per segmen, 0 untuk v1),
+#   flags (bit fitur v2, mis. FLAG_KEYCHECK, FLAG_APPEND, codec kompresi),
+#   key_check (KCV 16 byte jika FLAG_KEYCHECK, selain itu b''),
+#   header_size (total byte header sebelum ciphertext).
+# namedtuple (bukan typing.NamedTuple) agar import modul tetap ringan.
+HybrHeader = namedtuple("HybrHeader", "version key_cipher_bytes nonce segment_size flags key_check header_size")
+
+class _TruncatedHeader(ValueError):
+    """Header berakhir sebelum lengkap (streaming: tunggu data berikutnya)."""
+
+def _read_exact(fin, n: int) -> bytes:
+    """Baca tepat n byte dari header, atau gagal dengan pesan file korup."""
+    data = fin.read(n)
+    if len(data) != n:
+        raise _TruncatedHeader("File korup (header terpotong)")
+    return data
+
+def _build_header(version: int, key_cipher_bytes: bytes, nonce: bytes,
+                  segment_size: int = 0, flags: int = 0, key_check: bytes = b'') -> bytes:
+    """Susun header biner .hybr (v1 atau v2)."""
+    parts = [
+        MAGIC,                                   # Magic number (4 byte)
+        bytes([version]),                        # Versi (1 byte)
+        len(key_cipher_bytes).to_bytes(2, 'big'),# Panjang Kunci Terenkripsi (2 byte, big-endian)
+        key_cipher_bytes,                        # Kunci Terenkripsi (N byte)
+        len(nonce).to_bytes(1, 'big'),           # Panjang Nonce (1 byte)
+        nonce,                                   # Nonce (12 byte)
+    ]
+    if version == VERSION_V2:
+        parts.append(segment_size.to_bytes(4, 'big'))  # Ukuran segmen plaintext (4 byte)
+        parts.append(bytes([flags]))                   # Flags (1 byte)
+        if flags & FLAG_KEYCHECK:
+            parts.append(key_check)                    # Key check value (16 byte)
+    return b''.join(parts)
+
+def _read_header(fin) -> HybrHeader:
+    """Baca dan validasi header .hybr dari posisi file saat ini."""
+    magic = fin.read(4)
+    if magic != MAGIC:
+        raise ValueError("File bukan hasil enkripsi hybrid (magic mismatch)")
+
+    version = _read_exact(fin, 1)[0]
+    if version not in (VERSION_V1, VERSION_V2):
+        raise ValueError(f"Versi format .hybr tidak dikenal ({version})")
+
+    enc_key_len = int.from_bytes(_read_exact(fin, 2), 'big')
+    key_cipher_bytes = _read_exact(fin, enc_key_len)
+    nonce_len = _read_exact(fin, 1)[0]
+    nonce = _read_exact(fin, nonce_len)
+    if len(nonce) != AES_NONCE_LEN: # Validasi panjang nonce GCM
+        raise ValueError(f"Panjang nonce ({len(nonce)}) tidak 12 byte.")
+    header_size = 4 + 1 + 2 + enc_key_len + 1 + nonce_len
+
+    segment_size, flags, key_check = 0, 0, b''
+    if version == VERSION_V2:
+        segment_size = int.from_bytes(_read_exact(fin, 4), 'big')
+        flags = _read_exact(fin, 1)[0]
+        header_size += 5
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+            raise ValueError(f"File korup (ukuran segmen {segment_size} tidak valid)")
+        if flags & ~KNOWN_FLAGS:
+            raise ValueError(f"File memakai fitur header yang tidak didukung (flags {flags:#04x})")
+        if flags & FLAG_KEYCHECK:
+            key_check = _read_exact(fin, KEYCHECK_LEN)
+            header_size += KEYCHECK_LEN
+
+    return HybrHeader(version, key_cipher_bytes, nonce, segment_size, flags, key_check, header_size)
+
+# ---------- Key Wrapping (AES key <-> Myszkowski) ----------
+def _wrap_key(aes_key: bytes, keyword: str) -> bytes:
+    """Wrap kunci AES: hex string (64 char) ditransposisi Myszkowski lalu di-encode UTF-8."""
+    key_hex = aes_key.hex() # Konversi kunci biner 32-byte ke hex string (64 char)
+    key_cipher_text = myszkowski_encrypt(key_hex, keyword) # Transposisi hex string
+    return key_cipher_text.encode('utf-8') # Encode hasil transposisi ke bytes UTF-8
+
+def _unwrap_key(key_cipher_bytes: bytes, keyword: str) -> bytes:
+    """Kebalikan _wrap_key. Melempar ValueError jika keyword salah atau header korup."""
+    try:
+        key_cipher_text = key_cipher_bytes.decode('utf-8')
+    except UnicodeDecodeError:
+        raise ValueError("File korup (bagian kunci terenkripsi tidak valid UTF-8)")
+
+    try:
+         key_hex = myszkowski_decrypt(key_cipher_text, keyword)
+    except ValueError as e:
+         # Menangkap error dari validasi di myszkowski_decrypt
+         raise ValueError(f"Gagal mendekripsi kunci: {e}")
+
+    # Diagnostik hasil Myszkowski Decrypt (tanpa membocorkan kunci ke log/UI)
+    valid = len(key_hex) == 64 and all(c in "0123456789abcdef" for c in key_hex)
+    if valid:
+        message = "Hasil Myszkowski Decrypt valid (hex 64 karakter)"
+    else:
+        message = f"Hasil Myszkowski Decrypt BUKAN hex 64 karakter yang valid (panjang {len(key_hex)})"
+    _notify("key_unwrapped", message, length=len(key_hex), valid=valid)
+
+    try:
+        # Konversi hex string kembali ke kunci AES biner
+        aes_key = bytes.fromhex(key_hex)
+        if len(aes_key) != 32: # Validasi tambahan untuk AES-256
+             raise ValueError(f"Panjang kunci AES setelah dekripsi ({len(aes_key)}) tidak 32 byte.")
+    except ValueError as e:
+        # Gagal jika key_hex bukan hex string valid atau panjang salah
+        raise ValueError(f"Keyword Myszkowski salah atau file korup ({e})")
+    return aes_key
+
+def _key_check(aes_key: bytes, version: int, key_cipher_bytes: bytes, nonce: bytes,
+               segment_size: int, flags: int) -> bytes:
+    """
+    KCV = HMAC-SHA256(kunci AES, label || header tanpa KCV), dipotong 16 byte.
+    Mengikat kunci ke seluruh field header, sehingga keyword salah (atau header yang
+    diubah) terdeteksi hanya dari header, sebelum payload disentuh.
+    """
+    import hashlib, hmac # Import di sini: hanya dibutuhkan saat membuat/memeriksa header v2
+    prefix = _build_header(version, key_cipher_bytes, nonce, segment_size, flags)
+    return hmac.new(aes_key, KEYCHECK_LABEL + prefix, hashlib.sha256).digest()[:KEYCHECK_LEN]
+
+def _new_header(version: int, aes_key: bytes, keyword: str, nonce: bytes, segment_size: int = 0,
+                flags: int = 0) -> bytes:
+    """
+    Header untuk file baru: kunci di-wrap, dan v2 selalu membawa KCV (FLAG_KEYCHECK)
+    ditambah `flags` lain (mis. FLAG_APPEND).
+    """
+    key_cipher_bytes = _wrap_key(aes_key, keyword)
+    if version == VERSION_V1:
+        return _build_header(version, key_cipher_bytes, nonce)
+    flags |= FLAG_KEYCHECK
+    key_check = _key_check(aes_key, version, key_cipher_bytes, nonce, segment_size, flags)
+    return _build_header(version, key_cipher_bytes, nonce, segment_size, flags, key_check)
+
+def _check_key(header: HybrHeader, aes_key: bytes) -> bool:
+    """True jika header tidak punya KCV (tidak bisa diperiksa) atau KCV cocok."""
+    if not header.flags & FLAG_KEYCHECK:
+        return True
+    import hmac
+    expected = _key_check(aes_key, header.version, header.key_cipher_bytes, header.nonce,
+                          header.segment_size, header.flags)
+    return hmac.compare_digest(expected, header.key_check)
+
+def _header_key(header: HybrHeader, keyword: str) -> bytes:
+    """Unwrap kunci AES dari header dan periksa KCV (fail-fast sebelum payload dibaca)."""
+    aes_key = _unwrap_key(header.key_cipher_bytes, keyword)
+    if not _check_key(header, aes_key):
+        raise ValueError("Keyword Myszkowski salah (key check value di header tidak cocok)")
+    return aes_key
+
+# Hasil unwrap_keys per file: error berisi exception (ValueError/OSError) jika file,
+# header, atau keyword tidak valid
+UnwrappedKey = namedtuple("UnwrappedKey", "path header aes_key error")
+
+def unwrap_keys(paths, keyword: str):
     """
-    Mendekripsi ciphertext Myszkowski (Versi Revisi Perhitungan Kolom).
-    Tujuannya adalah merekonstruksi hex string kunci AES asli (64 karakter).
+    Baca header dan unwrap kunci AES banyak file .hybr sekaligus dengan keyword yang
+    sama (mis. untuk indexing atau verifikasi ulang ribuan file). Permutasi Myszkowski
+    dikompilasi sekali; kunci AES hasil unwrap tidak disimpan di luar hasil per file.
+    Mengembalikan list UnwrappedKey sesuai urutan `paths`; file yang gagal tidak
+    menghentikan batch, error-nya dicatat di field `error`.
     """
     if not keyword:
         raise ValueError("Keyword diperlukan untuk Myszkowski")
+    results = []
+    for path in paths:
+        header = None
+        try:
+            with open(path, 'rb') as fin:
+                header = _read_header(fin)
+            aes_key = _unwrap_key(header.key_cipher_bytes, keyword)
+            if not _check_key(header, aes_key):
+                raise ValueError("Keyword Myszkowski salah (key check value di header tidak cocok)")
+            results.append(UnwrappedKey(path, header, aes_key, None))
+        except (OSError, ValueError) as e:
+            results.append(UnwrappedKey(path, header, None, e))
+    return results
+
+def inspect_file(path: str, keyword: str = None) -> dict:
+    """
+    Ringkasan file .hybr dari header saja (payload tidak dibaca): versi, ukuran,
+    segmen, ada/tidaknya KCV, apakah file appendable, codec kompresi (plaintext_size
+    file terkompresi adalah ukuran stream terkompresi), dan jika `keyword` diberikan, status keyword:
+    'match' (KCV cocok), 'mismatch' (KCV tidak cocok atau hasil unwrap tidak valid),
+    atau 'unverified' (file tanpa KCV; keyword baru terbukti saat tag GCM diperiksa).
+    """
+    total = os.path.getsize(path)
+    with open(path, 'rb') as fin:
+        header = _read_header(fin)
+    info = {
+        "path": path,
+        "version": header.version,
+        "file_size": total,
+        "header_size": header.header_size,
+        "segment_size": header.segment_size or None,
+        "segments": None,
+        "plaintext_size": _plaintext_size(header, total),
+        "key_check": bool(header.flags & FLAG_KEYCHECK),
+        "appendable": bool(header.flags & FLAG_APPEND),
+        "compression": _codec_name(header.flags),
+        "keyword": None,
+    }
+    if header.version == VERSION_V2:
+        try:
+            info["segments"] = _v2_layout(header, total)[0]
+        except ValueError:
+            pass # File terpotong/korup: ukuran plaintext juga None
+    if keyword:
+        try:
+            aes_key = _unwrap_key(header.key_cipher_bytes, keyword)
+        except ValueError:
+            info["keyword"] = "mismatch"
+        else:
+            if not info["key_check"]:
+                info["keyword"] = "unverified"
+            else:
+                info["keyword"] = "match" if _check_key(header, aes_key) else "mismatch"
+    return info
+
+# ---------- Segmen v2 (AES-GCM per segmen) ----------
+def _segment_nonce(base_nonce: bytes, index: int, last: bool, tail_len: int = None) -> bytes:
+    """
+    Nonce unik per segmen: (indeks << 1 | penanda segmen terakhir) di-XOR ke 8 byte
+    terakhir nonce dasar. Penanda 'last' mencegah file dipotong di batas segmen.
+
+    File appendable (FLAG_APPEND) menulis ulang segmen terakhir di setiap append,
+    jadi panjang plaintext segmen terakhir (`tail_len`) ikut di-XOR ke 4 byte pertama.
+    Panjang itu selalu bertambah selama file hanya di-append dari input yang sama
+    (dicek append_file_hybrid), sehingga nonce yang sama tidak dipakai untuk dua
+    plaintext berbeda.
+    """
+    counter = int.from_bytes(base_nonce[4:], 'big') ^ ((index << 1) | int(last))
+    prefix = base_nonce[:4]
+    if last and tail_len is not None:
+        prefix = (int.from_bytes(prefix, 'big') ^ tail_len).to_bytes(4, 'big')
+    return prefix + counter.to_bytes(8, 'big')
+
+def _segment_aad(version: int, segment_size: int, flags: int) -> bytes:
+    """Parameter header yang ikut diotentikasi oleh setiap segmen."""
+    return MAGIC + bytes([version]) + segment_size.to_bytes(4, 'big') + bytes([flags])
+
+def _encrypt_segment(aes_key: bytes, nonce: bytes, aad: bytes, data: bytes) -> bytes:
+    """Enkripsi satu segmen; hasilnya ciphertext diikuti tag 16 byte."""
+    cipher = AES.new(aes_key, AES.MODE_GCM, nonce=nonce)
+    cipher.update(aad)
+    ciphertext, tag = cipher.encrypt_and_digest(data)
+    return ciphertext + tag
+
+def _decrypt_segment(aes_key: bytes, nonce: bytes, aad: bytes, sealed: bytes) -> bytes:
+    """Dekripsi dan verifikasi satu segmen (ciphertext + tag)."""
+    cipher = AES.new(aes_key, AES.MODE_GCM, nonce=nonce)
+    cipher.update(aad)
+    # Melempar ValueError("MAC check failed") jika segmen dimodifikasi
+    return cipher.decrypt_and_verify(sealed[:-AES_TAG_LEN], sealed[-AES_TAG_LEN:])
+
+def _seal_segment_to(aes_key: bytes, nonce: bytes, aad: bytes, src: memoryview, dst: memoryview) -> memoryview:
+    """
+    Enkripsi src ke dst[:n] dan tulis tag ke dst[n:n+16], tanpa alokasi buffer baru.
+    dst boleh berbagi memori dengan src (enkripsi in-place).
+    """
+    n = len(src)
+    cipher = AES.new(aes_key, AES.MODE_GCM, nonce=nonce)
+    cipher.update(aad)
+    cipher.encrypt(src, output=dst[:n])
+    dst[n:n + AES_TAG_LEN] = cipher.digest()
+    return dst[:n + AES_TAG_LEN]
+
+def _open_segment_to(aes_key: bytes, nonce: bytes, aad: bytes, src: memoryview, dst: memoryview) -> memoryview:
+    """Dekripsi segmen src (ciphertext + tag) ke dst lalu verifikasi tag-nya. dst boleh sama dengan src."""
+    size = len(src) - AES_TAG_LEN
+    cipher = AES.new(aes_key, AES.MODE_GCM, nonce=nonce)
+    cipher.update(aad)
+    cipher.decrypt(src[:size], output=dst[:size])
+    # Melempar ValueError("MAC check failed") jika segmen dimodifikasi
+    cipher.verify(src[size:])
+    return dst[:size]
+
+def _readinto_full(fin, view: memoryview) -> int:
+    """Isi view sampai penuh atau EOF (readinto() pada pipe bisa mengisi lebih sedikit)."""
+    got = 0
+    while got < len(view):
+        n = fin.readinto(view[got:])
+        if not n:
+            break
+        got += n
+    return got
+
+def _read_segments_into(fin, buffers, unit: int, stats: HybridStats):
+    """
+    Baca input per `unit` byte ke buffer ring secara bergiliran: yield (indeks, buffer, n, last).
+    Membaca satu segmen di depan agar segmen terakhir diketahui tanpa ukuran file.
+    File kosong tetap menghasilkan satu segmen (kosong) bertanda terakhir.
+    Isi buffer hanya valid sampai buffer yang sama diisi lagi (len(buffers) - 1 segmen kemudian).
+    """
+    slots = len(buffers)
+    index = 0
+    t0 = time.perf_counter()
+    n = _readinto_full(fin, buffers[0][:unit])
+    stats.add("read", time.perf_counter() - t0)
+    while True:
+        t0 = time.perf_counter()
+        following = _readinto_full(fin, buffers[(index + 1) % slots][:unit]) if n == unit else 0
+        stats.add("read", time.perf_counter() - t0)
+        last = not following
+        yield index, buffers[index % slots], n, last
+        if last:
+            return
+        index += 1
+        n = following
+
+def _pump_segments(fin, fout, aes_key: bytes, base_nonce: bytes, aad: bytes, unit: int,
+                   encrypt: bool, workers: int, executor: str, stats: HybridStats,
+                   pipelined: bool = False, append: bool = False):
+    """
+    Mesin segmen v2 untuk kedua arah. `unit` adalah byte yang dibaca per segmen
+    (ukuran segmen saat enkripsi, ukuran segmen + tag saat dekripsi).
+
+    Serial/thread pool: buffer ring dialokasikan sekali dan AES bekerja in-place,
+    jadi tidak ada alokasi per segmen. Process pool: data harus di-pickle,
+    sehingga setiap segmen tetap disalin ke bytes. `pipelined`: segmen diproses
+    satu per satu oleh _pipeline (baca & tulis di thread terpisah, workers diabaikan).
+    `append`: file FLAG_APPEND (nonce segmen terakhir diikat ke panjangnya).
+    """
+    overhead = 0 if encrypt else AES_TAG_LEN
+    if pipelined:
+        index = 0
+        def transform(buf, n, last):
+            nonlocal index
+            if not encrypt and n < AES_TAG_LEN:
+                raise ValueError("File korup (terlalu pendek untuk berisi data dan tag)")
+            nonce = _segment_nonce(base_nonce, index, last, n - overhead if append else None)
+            index += 1
+            if encrypt:
+                return _seal_segment_to(aes_key, nonce, aad, buf[:n], buf)
+            return _open_segment_to(aes_key, nonce, aad, buf[:n], buf)
+        _pipeline(fin, fout, unit, None, transform, encrypt, stats)
+        return
+
+    in_process = workers > 1 and executor == "process"
+    # Window _ordered_map (2x workers) + 1 segmen read-ahead + 1 segmen yang sedang ditulis
+    slots = workers * 2 + 2 if workers > 1 else 2
+    buffers = [memoryview(bytearray(unit + AES_TAG_LEN)) for _ in range(slots)]
+    if in_process:
+        fn = _encrypt_segment if encrypt else _decrypt_segment
+    else:
+        fn = _seal_segment_to if encrypt else _open_segment_to
 
-    cols = len(keyword) # Jumlah kolom = panjang keyword
-    original_plaintext_len = 64 # Kunci AES 32 byte = 64 hex karakter
-
-    # -- REKONSTRUKSI INFORMASI GRID ENKRIPSI --
-    # Kita perlu tahu persis bagaimana grid dibuat saat enkripsi
-
-    # Hitung jumlah baris yang digunakan saat enkripsi
-    # (panjang asli + cols - 1) // cols adalah cara cepat menghitung ceil(panjang/cols)
-    num_rows_encrypt = (original_plaintext_len + cols - 1) // cols
-
-    # Hitung total sel dalam grid enkripsi
-    grid_size_encrypt = num_rows_encrypt * cols
-
-    # Hitung berapa banyak padding '\0' yang ditambahkan di akhir saat enkripsi
-    padding_count_encrypt = grid_size_encrypt - original_plaintext_len
-
-    # -- LOGIKA DEKRIPSI (MEMBACA CIPHERTEXT SESUAI URUTAN KOLOM) --
-    ranks = _keyword_order(keyword) # Peringkat kolom
-    idxs = list(range(cols))
-    # Urutan kolom dibaca saat enkripsi (dan harus dibaca kembali saat dekripsi)
-    idxs_sorted_by_rank = sorted(idxs, key=lambda i: (ranks[i], i))
-
-    # Tentukan panjang aktual (jumlah karakter non-padding) untuk setiap kolom
-    col_lengths_in_grid = {}
-    for c in range(cols):
-        # Awalnya, setiap kolom berisi 'num_rows_encrypt' karakter
-        length = num_rows_encrypt
-        # Jika kolom ini berada di posisi yang diisi padding di baris terakhir, kurangi panjangnya
-        # Indeks sel terakhir di kolom c adalah (num_rows_encrypt - 1) * cols + c
-        # Jika indeks ini >= panjang asli, berarti sel itu berisi padding
-        if (num_rows_encrypt - 1) * cols + c >= original_plaintext_len:
-            length -= 1
-        col_lengths_in_grid[c] = length
-
-    # Sekarang kita tahu berapa banyak karakter yang harus dibaca dari ciphertext
-    # untuk mengisi setiap kolom sesuai urutan idxs_sorted_by_rank
-
-    parts = {} # Dictionary: {indeks_kolom_asli: [daftar karakter]}
-    ptr = 0 # Penunjuk posisi saat membaca ciphertext
-    for col_idx_in_read_order in idxs_sorted_by_rank:
-        # Ambil panjang sebenarnya dari dictionary yang sudah kita hitung
-        actual_chars_in_col = col_lengths_in_grid[col_idx_in_read_order]
-
-        # Baca sejumlah karakter tersebut dari ciphertext
-        read_chars = list(ciphertext[ptr : ptr + actual_chars_in_col])
-        parts[col_idx_in_read_order] = read_chars
-        ptr += actual_chars_in_col
-
-    # -- REKONSTRUKSI PLAINTEXT DARI KOLOM YANG SUDAH DIISI --
-    # Buat grid kosong untuk hasil dekripsi
-    decrypted_grid = [['\0'] * cols for _ in range(num_rows_encrypt)]
-
-    # Isi grid kosong dengan karakter dari 'parts', kolom per kolom (sesuai urutan asli 0..cols-1)
-    for col_idx in range(cols):
-        chars_for_this_col = parts.get(col_idx, [])
-        for r in range(len(chars_for_this_col)):
-            decrypted_grid[r][col_idx] = chars_for_this_col[r]
-
-    # Gabungkan karakter dari grid hasil dekripsi, baris per baris
-    plaintext_chars = []
-    for r in range(num_rows_encrypt):
-        for c in range(cols):
-            char = decrypted_grid[r][c]
-            # Hanya tambahkan jika BUKAN padding DAN belum mencapai panjang asli (64)
-            if char != '\0' and len(plaintext_chars) < original_plaintext_len:
-                 plaintext_chars.append(char)
-
-    plain = ''.join(plaintext_chars)
-
-    # Validasi Akhir (Sangat Penting)
-    if len(plain) != original_plaintext_len:
-         # Jika logika di atas benar, ini seharusnya tidak pernah terjadi
-         # Tapi jika terjadi, ini menandakan keyword salah atau ciphertext korup
-         raise ValueError(f"Dekripsi Myszkowski gagal: Panjang hasil ({len(plain)}) tidak sama dengan panjang asli ({original_plaintext_len}). Keyword kemungkinan salah atau file rusak.")
-
-    return plain # Kembalikan hex string hasil dekripsi
+    def tasks():
+        for index, buf, n, last in _read_segments_into(fin, buffers, unit, stats):
+            if not encrypt and n < AES_TAG_LEN:
+                raise ValueError("File korup (terlalu pendek untuk berisi data dan tag)")
+            nonce = _segment_nonce(base_nonce, index, last, n - overhead if append else None)
+            if in_process:
+                yield aes_key, nonce, aad, bytes(buf[:n])
+            else:
+                yield aes_key, nonce, aad, buf[:n], buf
+
+    # Waktu di luar baca/tulis = AES-GCM (termasuk menunggu worker)
+    start = time.perf_counter()
+    io_before = stats.phases["read"] + stats.phases["write"]
+    for out in _ordered_map(fn, tasks(), workers, executor):
+        t0 = time.perf_counter()
+        fout.write(out)
+        stats.add("write", time.perf_counter() - t0)
+        stats.advance(len(out) - AES_TAG_LEN if encrypt else len(out))
+    io_spent = stats.phases["read"] + stats.phases["write"] - io_before
+    stats.add("crypt", time.perf_counter() - start - io_spent)
+
+def _pipeline(fin, fout, unit: int, limit, transform, encrypt: bool, stats: HybridStats):
+    """
+    Mesin pipelined: thread reader -> crypto (thread pemanggil) -> thread writer,
+    dihubungkan queue berisi PIPELINE_DEPTH buffer yang dipakai ulang. Baca, AES-GCM,
+    dan tulis berjalan bersamaan (pycryptodome & I/O file melepas GIL), sehingga
+    throughput mendekati tahap yang paling lambat, bukan jumlah ketiganya.
+
+    Reader membaca per `unit` byte (paling banyak `limit` byte total jika bukan None)
+    dan membaca satu unit di depan agar unit terakhir diketahui. `transform(buf, n, last)`
+    memproses buf[:n] in-place dan mengembalikan memoryview yang harus ditulis.
+    Input kosong menghasilkan satu panggilan transform dengan n=0, last=True.
+    Mengembalikan jumlah byte yang dibaca.
+    """
+    # Import di sini agar modul tetap ringan untuk backend lain
+    import queue
+    import threading
+
+    free, filled, written = queue.Queue(), queue.Queue(), queue.Queue()
+    for _ in range(PIPELINE_DEPTH):
+        free.put(memoryview(bytearray(unit + AES_TAG_LEN)))
+    stop = threading.Event()
+    errors = []
+    read_total = 0
+    clock = time.perf_counter
+
+    def reader():
+        nonlocal read_total
+        try:
+            left = limit
+            pending = None
+            while not stop.is_set():
+                buf = free.get()
+                if buf is None: # Dibangunkan saat pipeline dihentikan
+                    break
+                size = unit if left is None else min(unit, left)
+                t0 = clock()
+                n = _readinto_full(fin, buf[:size]) if size else 0
+                stats.add("read", clock() - t0)
+                read_total += n
+                if left is not None:
+                    left -= n
+                if pending is not None:
+                    filled.put((pending[0], pending[1], n == 0))
+                if n == 0:
+                    if pending is None:
+                        filled.put((buf, 0, True))
+                    else:
+                        free.put(buf)
+                    break
+                pending = (buf, n)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            filled.put(None)
+
+    def writer():
+        while True:
+            item = written.get()
+            if item is None:
+                return
+            buf, out = item
+            if not errors: # Setelah error, buffer hanya dikembalikan agar reader tidak macet
+                try:
+                    t0 = clock()
+                    fout.write(out)
+                    stats.add("write", clock() - t0)
+                except BaseException as e:
+                    errors.append(e)
+            free.put(buf)
+
+    threads = [threading.Thread(target=reader, daemon=True), threading.Thread(target=writer, daemon=True)]
+    for thread in threads:
+        thread.start()
+    try:
+        while not errors:
+            item = filled.get()
+            if item is None:
+                break
+            buf, n, last = item
+            t0 = clock()
+            out = transform(buf, n, last)
+            stats.add("crypt", clock() - t0)
+            written.put((buf, out))
+            stats.advance(n if encrypt else len(out))
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        stop.set()
+        free.put(None)
+        written.put(None)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return read_total
+
+def _pick_chunk_size(fin) -> int:
+    """
+    Pilih ukuran chunk I/O otomatis dari ukuran file dan block size storage:
+    sekitar 1/256 ukuran file, dibatasi CHUNK..MAX_CHUNK, minimal satu block
+    (storage jaringan biasanya melaporkan st_blksize besar). Pipe tetap memakai CHUNK.
+    """
+    try:
+        st = os.fstat(fin.fileno())
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return CHUNK
+    if not stat.S_ISREG(st.st_mode):
+        return CHUNK
+    blksize = getattr(st, 'st_blksize', 0) or 4096
+    size = min(MAX_CHUNK, max(CHUNK, st.st_size // 256))
+    size -= size % blksize
+    return max(size, blksize)
+
+def _v2_layout(header: HybrHeader, total: int):
+    """Hitung (jumlah segmen, panjang segmen terakhir termasuk tag) dari ukuran file."""
+    payload = total - header.header_size
+    if payload < AES_TAG_LEN:
+        raise ValueError("File korup (terlalu pendek untuk berisi data dan tag)")
+    full = header.segment_size + AES_TAG_LEN
+    count = -(-payload // full) # ceil(payload / full)
+    last_len = payload - (count - 1) * full
+    if last_len < AES_TAG_LEN:
+        raise ValueError("File korup (segmen terakhir terpotong)")
+    return count, last_len
+
+# ---------- Eksekusi Paralel ----------
+def _resolve_workers(workers) -> int:
+    """None berarti pakai semua core yang tersedia."""
+    if workers is None:
+        return os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("Jumlah workers minimal 1")
+    return workers
+
+def _ordered_map(fn, tasks, workers: int, executor: str):
+    """
+    Seperti map(fn, *task) tetapi disebar ke thread/process pool.
+    Hasil dikembalikan sesuai urutan input, dan jumlah task yang sedang berjalan
+    dibatasi (2x workers) agar memori tetap konstan untuk file sebesar apa pun.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield fn(*task)
+        return
+
+    # Import di sini: concurrent.futures (terutama multiprocessing) mahal untuk startup
+    if executor == "thread":
+        from concurrent.futures import ThreadPoolExecutor as pool_cls
+    elif executor == "process":
+        from concurrent.futures import ProcessPoolExecutor as pool_cls
+    else:
+        raise ValueError(f"Executor tidak dikenal: {executor!r} (pilih 'thread' atau 'process')")
+
+    with pool_cls(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(fn, *task))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# ---------- Kompresi (Opsional, Sebelum Enkripsi) ----------
+# Plaintext dikompresi sebagai satu stream lalu dienkripsi per segmen seperti biasa,
+# jadi semua mesin segmen (paralel, pipelined, streaming) tetap dipakai apa adanya.
+# Offset plaintext tidak lagi sejajar dengan segmen: akses acak, mmap, dan append
+# tidak tersedia untuk file terkompresi.
+def _codec_flags(compression) -> int:
+    """Bit flags header untuk nama codec (None = tanpa kompresi)."""
+    if compression is None:
+        return 0
+    if compression not in COMPRESSION_CODECS:
+        raise ValueError(f"Codec kompresi tidak dikenal: {compression!r} (pilih {', '.join(COMPRESSION_CODECS)})")
+    return (COMPRESSION_CODECS.index(compression) + 1) << FLAG_CODEC_SHIFT
+
+def _codec_name(flags: int):
+    """Nama codec dari flags header, atau None jika payload tidak dikompresi."""
+    codec_id = (flags & FLAG_CODEC_MASK) >> FLAG_CODEC_SHIFT
+    return COMPRESSION_CODECS[codec_id - 1] if codec_id else None
+
+def _compressor(compression: str):
+    # Import di sini: codec hanya dimuat jika kompresi dipakai
+    if compression == "zlib":
+        import zlib
+        return zlib.compressobj(6)
+    if compression == "lzma":
+        import lzma
+        return lzma.LZMACompressor(check=lzma.CHECK_NONE) # Integritas sudah dijamin tag GCM
+    import bz2
+    return bz2.BZ2Compressor(9)
+
+def _decompressor(compression: str):
+    if compression == "zlib":
+        import zlib
+        return zlib.decompressobj()
+    if compression == "lzma":
+        import lzma
+        return lzma.LZMADecompressor()
+    import bz2
+    return bz2.BZ2Decompressor()
+
+def _worth_compressing(samples) -> bool:
+    """
+    Uji cepat zlib level 1 atas sampel data: False jika sampel kosong atau hampir tidak
+    menyusut (video/arsip yang sudah terkompresi), sehingga kompresi dilewati.
+    """
+    import zlib
+    raw = b''.join(samples)
+    if not raw:
+        return False
+    return len(zlib.compress(raw, 1)) <= len(raw) * COMPRESS_MAX_RATIO
+
+def _sample_file(fin) -> list:
+    """Ambil COMPRESS_SAMPLES potongan yang tersebar merata di file (posisi fin dikembalikan)."""
+    pos = fin.tell()
+    size = os.fstat(fin.fileno()).st_size
+    step = max(COMPRESS_SAMPLE, size // COMPRESS_SAMPLES)
+    samples = []
+    for offset in range(0, size, step)[:COMPRESS_SAMPLES]:
+        fin.seek(offset)
+        samples.append(fin.read(COMPRESS_SAMPLE))
+    fin.seek(pos)
+    return samples
+
+class _CompressReader(io.RawIOBase):
+    """
+    Sumber baca untuk mesin segmen: menghasilkan stream terkompresi dari `fin`
+    (didahului `head`, mis. sampel yang sudah terbaca dari pipe). Tanpa codec,
+    data diteruskan apa adanya. Progress `stats` dihitung dari byte input asli.
+    """
+
+    def __init__(self, fin, compression, stats: HybridStats, head: bytes = b''):
+        super().__init__()
+        self._fin = fin
+        self._compressor = _compressor(compression) if compression else None
+        self._stats = stats
+        self._head = head
+        self._buf = bytearray()
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        want = len(b)
+        while len(self._buf) < want and not self._eof:
+            if self._head:
+                data, self._head = self._head, b''
+            else:
+                data = self._fin.read(max(want, CHUNK))
+            if not data:
+                self._eof = True
+                if self._compressor is not None:
+                    self._buf += self._compressor.flush()
+                continue
+            self._stats.advance(len(data))
+            self._buf += self._compressor.compress(data) if self._compressor is not None else data
+        n = min(want, len(self._buf))
+        b[:n] = self._buf[:n]
+        del self._buf[:n]
+        return n
+
+class _DecompressWriter:
+    """
+    Tujuan tulis untuk mesin segmen: plaintext terverifikasi didekompresi secara
+    streaming ke `fout`, dalam potongan paling besar MAX_CHUNK (memori tetap kecil
+    meskipun rasio kompresinya ekstrem). finish() memastikan stream terkompresi lengkap.
+    StreamDecryptor memakai iter_decompress() langsung (tanpa `fout`).
+    """
+
+    def __init__(self, fout, compression: str):
+        self._fout = fout
+        self._decompressor = _decompressor(compression)
+        self._zlib = compression == "zlib"
+
+    def iter_decompress(self, data):
+        """Generator: dekompresi `data`, hasilkan output per potongan paling besar MAX_CHUNK."""
+        d = self._decompressor
+        if d.eof:
+            if len(data):
+                raise ValueError("File korup (data tambahan setelah akhir stream terkompresi)")
+            return
+        if self._zlib:
+            while True:
+                out = d.decompress(data, MAX_CHUNK)
+                if out:
+                    yield out
+                data = d.unconsumed_tail
+                if d.eof or (not data and len(out) < MAX_CHUNK):
+                    break
+        else:
+            out = d.decompress(data, MAX_CHUNK)
+            while True:
+                if out:
+                    yield out
+                if d.eof or d.needs_input:
+                    break
+                out = d.decompress(b'', MAX_CHUNK)
+        if d.eof and d.unused_data:
+            raise ValueError("File korup (data tambahan setelah akhir stream terkompresi)")
+
+    def write(self, data) -> int:
+        n = len(data)
+        for out in self.iter_decompress(data):
+            self._fout.write(out)
+        return n
+
+    def flush(self):
+        self._fout.flush()
+
+    def finish(self):
+        if not self._decompressor.eof:
+            raise ValueError("File korup (stream terkompresi tidak lengkap)")
 
 # ---------- Fungsi Enkripsi & Dekripsi Hybrid (Menggunakan fungsi Myszkowski di atas) ----------
-def encrypt_file_hybrid(in_path: str, out_path: str, keyword_for_transpose: str):
-    """Enkripsi file besar secara chunked dengan AES-GCM dan Myszkowski."""
+def encrypt_file_hybrid(in_path: str, out_path: str, keyword_for_transpose: str,
+                        version: int = VERSION_V2, segment_size: int = SEGMENT_SIZE,
+                        workers=None, executor: str = "thread", chunk_size=None,
+                        backend: str = "buffered", progress=None, compression: str = None) -> HybridStats:
+    """
+    Enkripsi file besar secara chunked dengan AES-GCM dan Myszkowski.
+
+    Default menulis format v2 (tersegmentasi) yang bisa diproses paralel oleh
+    `workers` thread/process; `version=1` tetap tersedia untuk format lama.
+    `chunk_size` mengatur ukuran I/O format v1 (None = otomatis); format v2
+    membaca per segmen. `backend="mmap"` memetakan input & output ke memori
+    (khusus file lokal); `backend="pipelined"` menjalankan baca, AES-GCM, dan tulis
+    bersamaan di thread terpisah (format file tidak berubah). `progress(stats)`
+    dipanggil berkala selama proses; statistik akhir (byte & waktu per fase) dikembalikan.
+
+    `compression` ("zlib", "lzma", "bz2"; khusus v2) mengompresi plaintext sebelum
+    enkripsi dan mencatat codec-nya di header. Beberapa sampel file diuji dulu; data
+    yang sudah terkompresi (MP4, ZIP, JPEG) dienkripsi tanpa kompresi. File yang
+    benar-benar dikompresi selalu memakai jalur buffered/pipelined (bukan mmap).
+    """
+    if not keyword_for_transpose:
+        raise ValueError("Keyword diperlukan untuk Myszkowski")
+    _check_backend(backend)
+    if version not in (VERSION_V1, VERSION_V2):
+        raise ValueError(f"Versi format .hybr tidak dikenal ({version})")
+    if version == VERSION_V2 and not 0 < segment_size <= MAX_SEGMENT_SIZE:
+        raise ValueError(f"Ukuran segmen harus 1..{MAX_SEGMENT_SIZE} byte")
+    codec_flags = _codec_flags(compression)
+    if codec_flags and version != VERSION_V2:
+        raise ValueError("Kompresi hanya didukung format v2")
+    total = os.path.getsize(in_path)
+    stats = HybridStats(total, progress)
+    if codec_flags:
+        with open(in_path, 'rb') as fin:
+            if not _worth_compressing(_sample_file(fin)):
+                codec_flags = 0
+    if codec_flags:
+        # Progress dihitung dari byte input oleh _CompressReader; fase dari mesin segmen
+        inner = HybridStats()
+        workers = 1 if total <= segment_size else _resolve_workers(workers)
+        with open(in_path, 'rb') as fin, open(out_path, 'wb') as fout:
+            _encrypt_v2_stream(_CompressReader(fin, compression, stats), fout, keyword_for_transpose,
+                               segment_size, workers, executor, inner, backend == "pipelined", codec_flags)
+        for name, seconds in inner.phases.items():
+            stats.add(name, seconds)
+    elif backend == "mmap":
+        _encrypt_file_mmap(in_path, out_path, keyword_for_transpose, version,
+                           segment_size if version == VERSION_V2 else 0,
+                           _resolve_workers(workers), executor, chunk_size, stats)
+    elif version == VERSION_V1:
+        _encrypt_v1(in_path, out_path, keyword_for_transpose, chunk_size, stats, backend == "pipelined")
+    else:
+        # File satu segmen tidak perlu pool
+        workers = 1 if total <= segment_size else _resolve_workers(workers)
+        with open(in_path, 'rb') as fin, open(out_path, 'wb') as fout:
+            _encrypt_v2_stream(fin, fout, keyword_for_transpose, segment_size, workers, executor, stats,
+                               backend == "pipelined")
+    stats.finish()
+    return stats
+
+def _encrypt_v1(in_path: str, out_path: str, keyword_for_transpose: str, chunk_size, stats: HybridStats,
+                pipelined: bool = False):
+    """Format v1: satu stream AES-GCM untuk seluruh file, tag di akhir."""
     # 1. Buat Kunci AES & Nonce secara acak
     aes_key = get_random_bytes(32) # AES-256 (32 byte)
-    aes_nonce = get_random_bytes(12) # GCM standard nonce size (12 byte)
+    aes_nonce = get_random_bytes(AES_NONCE_LEN) # GCM standard nonce size (12 byte)
     cipher = AES.new(aes_key, AES.MODE_GCM, nonce=aes_nonce)
 
     # 2. Enkripsi Kunci AES dengan Myszkowski
-    key_hex = aes_key.hex() # Konversi kunci biner 32-byte ke hex string (64 char)
-    key_cipher_text = myszkowski_encrypt(key_hex, keyword_for_transpose) # Transposisi hex string
-    key_cipher_bytes = key_cipher_text.encode('utf-8') # Encode hasil transposisi ke bytes UTF-8
-    enc_key_len = len(key_cipher_bytes)
+    header = _new_header(VERSION_V1, aes_key, keyword_for_transpose, aes_nonce)
 
     # 3. Proses Enkripsi File
-    total = os.path.getsize(in_path)
     with open(in_path, 'rb') as fin, open(out_path, 'wb') as fout:
-        # Tulis Header File (Struktur Biner)
-        fout.write(b'HYBR')                            # Magic number (4 byte)
-        fout.write(bytes([1]))                         # Versi (1 byte)
-        fout.write(enc_key_len.to_bytes(2, 'big'))     # Panjang Kunci Terenkripsi (2 byte, big-endian)
-        fout.write(key_cipher_bytes)                   # Kunci Terenkripsi (N byte)
-        fout.write(len(aes_nonce).to_bytes(1, 'big'))  # Panjang Nonce (1 byte)
-        fout.write(aes_nonce)                          # Nonce (12 byte)
-
-        # Enkripsi Konten File per Chunk (64KB)
-        while True:
-            chunk = fin.read(CHUNK)
-            if not chunk: # Jika sudah akhir file
-                break
-            encrypted_chunk = cipher.encrypt(chunk)
-            fout.write(encrypted_chunk)
+        fout.write(header)
+
+        if pipelined:
+            def transform(buf, n, last):
+                cipher.encrypt(buf[:n], output=buf[:n])
+                return buf[:n]
+            _pipeline(fin, fout, chunk_size or _pick_chunk_size(fin), None, transform, True, stats)
+        else:
+            # Enkripsi Konten File per Chunk, in-place di satu buffer yang dipakai ulang
+            buf = memoryview(bytearray(chunk_size or _pick_chunk_size(fin)))
+            clock = time.perf_counter
+            while True:
+                t0 = clock()
+                n = fin.readinto(buf)
+                t1 = clock()
+                if not n: # Jika sudah akhir file
+                    stats.add("read", t1 - t0)
+                    break
+                cipher.encrypt(buf[:n], output=buf[:n])
+                t2 = clock()
+                fout.write(buf[:n])
+                t3 = clock()
+                stats.add("read", t1 - t0)
+                stats.add("crypt", t2 - t1)
+                stats.add("write", t3 - t2)
+                stats.advance(n)
 
         # Tulis GCM Authentication Tag di akhir file setelah semua data
         tag = cipher.digest() # Ambil tag setelah semua enkripsi
         fout.write(tag) # Tag (16 byte)
 
-def decrypt_file_hybrid(in_path: str, out_path: str, keyword_for_transpose: str):
-    """Dekripsi file besar secara chunked, dengan penanganan error dan debugging."""
+def decrypt_file_hybrid(in_path: str, out_path: str, keyword_for_transpose: str,
+                        workers=None, executor: str = "thread", chunk_size=None,
+                        backend: str = "buffered", progress=None) -> HybridStats:
+    """
+    Dekripsi file besar secara chunked (v1 atau v2), dengan penanganan error dan debugging.
+    `progress(stats)` dipanggil berkala; statistik akhir dikembalikan. File terkompresi
+    didekompresi secara streaming (backend mmap otomatis diganti buffered).
+    """
+    _check_backend(backend)
     total = os.path.getsize(in_path)
     with open(in_path, 'rb') as fin:
         # 1. Baca dan Validasi Header
-        magic = fin.read(4)
-        if magic != b'HYBR':
-            raise ValueError("File bukan hasil enkripsi hybrid (magic mismatch)")
-
-        _ = fin.read(1)  # Baca byte versi (saat ini versi 1)
-        enc_key_len = int.from_bytes(fin.read(2), 'big')
-        key_cipher_bytes = fin.read(enc_key_len)
-        try:
-            key_cipher_text = key_cipher_bytes.decode('utf-8')
-        except UnicodeDecodeError:
-            raise ValueError("File korup (bagian kunci terenkripsi tidak valid UTF-8)")
+        header = _read_header(fin)
+        stats = HybridStats(_plaintext_size(header, total), progress)
 
         # 2. Dekripsi Kunci AES dengan Myszkowski
-        try:
-             key_hex = myszkowski_decrypt(key_cipher_text, keyword_for_transpose)
-        except ValueError as e:
-             # Menangkap error dari validasi panjang di myszkowski_decrypt
-             raise ValueError(f"Gagal mendekripsi kunci: {e}")
-
-
-        # ---> BLOK DEBUGGING (Memeriksa hasil Myszkowski Decrypt) <---
-        # Menampilkan output langsung di UI Streamlit
-        st.write(f"DEBUG: Hasil Myszkowski Decrypt: '{key_hex}' (Panjang: {len(key_hex)})")
-        if not re.fullmatch(r'[0-9a-f]{64}', key_hex):
-             st.warning("!!! DEBUG: WARNING! Hasil Myszkowski Decrypt BUKAN hex string 64 karakter yang valid!")
-        else:
-             st.info("--- DEBUG: Hasil Myszkowski Decrypt TERLIHAT valid (hex 64 char).")
-        # ---> AKHIR BLOK DEBUGGING <---
-
-        try:
-            # Konversi hex string kembali ke kunci AES biner
-            aes_key = bytes.fromhex(key_hex)
-            if len(aes_key) != 32: # Validasi tambahan untuk AES-256
-                 raise ValueError(f"Panjang kunci AES setelah dekripsi ({len(aes_key)}) tidak 32 byte.")
-        except ValueError as e:
-            # Gagal jika key_hex bukan hex string valid atau panjang salah
-            raise ValueError(f"Keyword Myszkowski salah atau file korup ({e})")
-
-        # Lanjutkan membaca sisa header
-        nonce_len = int.from_bytes(fin.read(1), 'big')
-        nonce = fin.read(nonce_len)
-        if len(nonce) != 12: # Validasi panjang nonce GCM
-            raise ValueError(f"Panjang nonce ({len(nonce)}) tidak 12 byte.")
-
-        # 3. Siapkan Cipher AES-GCM untuk dekripsi
-        cipher = AES.new(aes_key, AES.MODE_GCM, nonce=nonce)
-
-        # Hitung ukuran ciphertext sebenarnya (Total - Header - Tag)
-        header_size = 4 + 1 + 2 + enc_key_len + 1 + nonce_len
-        ciphertext_size = total - header_size - AES_TAG_LEN # Kurangi ukuran tag
-        if ciphertext_size < 0:
-            raise ValueError("File korup (terlalu pendek untuk berisi data dan tag)")
+        aes_key = _header_key(header, keyword_for_transpose)
 
         # Path untuk file output sementara (untuk keamanan jika verifikasi gagal)
         temp_out_path = out_path + ".tmp_decrypt"
 
         try:
-            # 4. Dekripsi Konten File per Chunk ke file sementara
-            with open(temp_out_path, 'wb') as fout:
-                bytes_read = 0
-                while bytes_read < ciphertext_size:
-                    read_size = min(CHUNK, ciphertext_size - bytes_read)
-                    chunk = fin.read(read_size)
-                    if not chunk and bytes_read < ciphertext_size:
-                        # File berakhir sebelum waktunya
-                        raise ValueError("File berakhir secara tak terduga saat membaca ciphertext")
-                    if not chunk:
-                        break # Akhir ciphertext
-                    decrypted_chunk = cipher.decrypt(chunk)
-                    fout.write(decrypted_chunk)
-                    bytes_read += len(chunk)
-
-            # 5. Baca GCM Tag dari akhir file input
-            tag = fin.read(AES_TAG_LEN)
-            if len(tag) != AES_TAG_LEN:
-                raise ValueError("Tag GCM tidak lengkap atau file rusak")
-
-            # 6. Verifikasi Tag (PENTING!)
-            # Ini akan melempar ValueError jika tag tidak cocok
-            cipher.verify(tag)
+            # 3. Dekripsi Konten File ke file sementara
+            codec = _codec_name(header.flags)
+            if backend == "mmap" and codec is None:
+                _decrypt_payload_mmap(fin, temp_out_path, header, aes_key, total,
+                                      _resolve_workers(workers), executor, chunk_size, stats)
+            else:
+                pipelined = backend == "pipelined"
+                with open(temp_out_path, 'wb') as fout:
+                    if header.version == VERSION_V1:
+                        _decrypt_v1_payload(fin, fout, header, aes_key, total, chunk_size, stats, pipelined)
+                    else:
+                        # Payload terkompresi: plaintext terverifikasi didekompresi saat ditulis
+                        sink = _DecompressWriter(fout, codec) if codec else fout
+                        _decrypt_v2_payload(fin, sink, header, aes_key, total,
+                                            _resolve_workers(workers), executor, stats, pipelined)
+                        if codec:
+                            sink.finish()
 
-            # 7. Jika verifikasi berhasil, rename file sementara menjadi file output akhir
+            # 4. Jika verifikasi berhasil, rename file sementara menjadi file output akhir
+            t0 = time.perf_counter()
             if os.path.exists(out_path): # Hapus file output lama jika ada
                  os.remove(out_path)
             os.rename(temp_out_path, out_path)
+            stats.add("rename", time.perf_counter() - t0)
 
         except ValueError as e:
-            # Jika cipher.verify() gagal atau error lain terjadi, hapus file sementara
+            # Jika verifikasi tag gagal atau error lain terjadi, hapus file sementara
             if os.path.exists(temp_out_path):
                 os.remove(temp_out_path)
             # Re-raise error, tambahkan konteks jika dari verify
@@ -282,4 +1058,1054 @@ def decrypt_file_hybrid(in_path: str, out_path: str, keyword_for_transpose: str)
             # Tangkap error tak terduga lainnya dan bersihkan
             if os.path.exists(temp_out_path):
                 os.remove(temp_out_path)
-            raise e # Re-raise error
\ No newline at end of file
+            raise e # Re-raise error
+    stats.finish()
+    return stats
+
+def _plaintext_size(header: HybrHeader, total: int) -> int:
+    """Perkiraan ukuran plaintext dari ukuran file (None jika file jelas korup)."""
+    try:
+        if header.version == VERSION_V1:
+            size = total - header.header_size - AES_TAG_LEN
+        else:
+            count, _ = _v2_layout(header, total)
+            size = total - header.header_size - count * AES_TAG_LEN
+    except ValueError:
+        return None
+    return size if size >= 0 else None
+
+def _decrypt_v1_payload(fin, fout, header: HybrHeader, aes_key: bytes, total: int, chunk_size,
+                        stats: HybridStats, pipelined: bool = False):
+    """Format v1: dekripsi satu stream lalu verifikasi tag di akhir file."""
+    # Siapkan Cipher AES-GCM untuk dekripsi
+    cipher = AES.new(aes_key, AES.MODE_GCM, nonce=header.nonce)
+
+    # Hitung ukuran ciphertext sebenarnya (Total - Header - Tag)
+    ciphertext_size = total - header.header_size - AES_TAG_LEN # Kurangi ukuran tag
+    if ciphertext_size < 0:
+        raise ValueError("File korup (terlalu pendek untuk berisi data dan tag)")
+
+    if pipelined:
+        def transform(buf, n, last):
+            cipher.decrypt(buf[:n], output=buf[:n])
+            return buf[:n]
+        if _pipeline(fin, fout, chunk_size or _pick_chunk_size(fin), ciphertext_size,
+                     transform, False, stats) != ciphertext_size:
+            raise ValueError("File berakhir secara tak terduga saat membaca ciphertext")
+    else:
+        # Dekripsi Konten File per Chunk, in-place di satu buffer yang dipakai ulang
+        buf = memoryview(bytearray(chunk_size or _pick_chunk_size(fin)))
+        bytes_read = 0
+        clock = time.perf_counter
+        while bytes_read < ciphertext_size:
+            read_size = min(len(buf), ciphertext_size - bytes_read)
+            t0 = clock()
+            n = fin.readinto(buf[:read_size])
+            t1 = clock()
+            if not n:
+                # File berakhir sebelum waktunya
+                raise ValueError("File berakhir secara tak terduga saat membaca ciphertext")
+            cipher.decrypt(buf[:n], output=buf[:n])
+            t2 = clock()
+            fout.write(buf[:n])
+            t3 = clock()
+            stats.add("read", t1 - t0)
+            stats.add("crypt", t2 - t1)
+            stats.add("write", t3 - t2)
+            stats.advance(n)
+            bytes_read += n
+
+    # Baca GCM Tag dari akhir file input
+    tag = fin.read(AES_TAG_LEN)
+    if len(tag) != AES_TAG_LEN:
+        raise ValueError("Tag GCM tidak lengkap atau file rusak")
+
+    # Verifikasi Tag (PENTING!)
+    # Ini akan melempar ValueError jika tag tidak cocok
+    t0 = time.perf_counter()
+    cipher.verify(tag)
+    stats.add("verify", time.perf_counter() - t0)
+
+def _decrypt_v2_payload(fin, fout, header: HybrHeader, aes_key: bytes, total: int,
+                        workers: int, executor: str, stats: HybridStats, pipelined: bool = False):
+    """Format v2: setiap segmen didekripsi dan diverifikasi sendiri (bisa paralel)."""
+    count, _ = _v2_layout(header, total)
+    aad = _segment_aad(header.version, header.segment_size, header.flags)
+    if count == 1:
+        workers = 1
+    _pump_segments(fin, fout, aes_key, header.nonce, aad, header.segment_size + AES_TAG_LEN,
+                   False, workers, executor, stats, pipelined, bool(header.flags & FLAG_APPEND))
+
+# ---------- Verifikasi Integritas (tanpa output) ----------
+class _NullSink:
+    """File object tujuan yang membuang semua data (plaintext verifikasi tidak pernah ditulis)."""
+
+    def write(self, data) -> int:
+        return len(data)
+
+    def flush(self):
+        pass
+
+def verify_file(in_path: str, keyword_for_transpose: str, workers=None, executor: str = "thread",
+                chunk_size=None, progress=None) -> HybridStats:
+    """
+    Periksa integritas file .hybr tanpa menulis apa pun ke disk: ciphertext dibaca
+    secara streaming dan tag GCM (v1) atau tag setiap segmen (v2) diotentikasi,
+    plaintext langsung dibuang. Melempar ValueError yang sama seperti
+    decrypt_file_hybrid jika keyword salah, file rusak, atau terpotong.
+    """
+    total = os.path.getsize(in_path)
+    with open(in_path, 'rb') as fin:
+        header = _read_header(fin)
+        stats = HybridStats(_plaintext_size(header, total), progress)
+        aes_key = _header_key(header, keyword_for_transpose)
+        try:
+            if header.version == VERSION_V1:
+                _decrypt_v1_payload(fin, _NullSink(), header, aes_key, total, chunk_size, stats)
+            else:
+                _decrypt_v2_payload(fin, _NullSink(), header, aes_key, total,
+                                    _resolve_workers(workers), executor, stats)
+        except ValueError as e:
+            if "MAC check failed" in str(e):
+                raise ValueError("Verifikasi Gagal (Keyword salah atau file telah dimodifikasi): Integritas data terganggu.")
+            raise
+    stats.finish()
+    return stats
+
+# ---------- Backend mmap (File Lokal Besar) ----------
+def _check_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend tidak dikenal: {backend!r} (pilih salah satu dari {', '.join(BACKENDS)})")
+
+def _map_output(path: str, size: int):
+    """
+    Buat file output berukuran tetap `size` lalu petakan ke memori (read-write).
+
+    Blok disk dialokasikan dulu dengan posix_fallocate: file sparse hasil truncate
+    saja membuat disk penuh muncul sebagai SIGBUS saat menulis ke mmap, bukan OSError.
+    """
+    fout = open(path, 'w+b')
+    try:
+        fout.truncate(size)
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fout.fileno(), 0, size)
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+                    raise # ENOSPC dkk.; filesystem tanpa dukungan fallocate tetap memakai file sparse
+        return fout, mmap.mmap(fout.fileno(), size, access=mmap.ACCESS_WRITE)
+    except BaseException:
+        fout.close()
+        raise
+
+def _release_frames(exc: BaseException):
+    """
+    Frame di traceback (termasuk frame worker thread) masih memegang slice
+    memoryview ke mmap sehingga mmap.close() gagal dengan BufferError.
+    Kosongkan variabel lokal frame yang sudah selesai sebelum mmap ditutup.
+    """
+    import traceback
+    traceback.clear_frames(exc.__traceback__)
+
+def _close_maps(*items):
+    """Tutup mmap/file; semua memoryview ke mmap harus sudah dilepas sebelumnya."""
+    for item in items:
+        if item is not None:
+            item.close()
+
+def _map_segments(src: memoryview, dst: memoryview, spans, aes_key: bytes, base_nonce: bytes,
+                  aad: bytes, encrypt: bool, workers: int, executor: str, stats: HybridStats,
+                  append: bool = False):
+    """
+    Proses segmen v2 langsung dari slice mmap input ke slice mmap output.
+    `spans()` menghasilkan (indeks, last, awal_src, akhir_src, awal_dst).
+    Thread pool bekerja tanpa salinan; process pool butuh salinan bytes untuk pickle.
+    """
+    overhead = 0 if encrypt else AES_TAG_LEN
+    def nonce(index, last, s0, s1):
+        return _segment_nonce(base_nonce, index, last, s1 - s0 - overhead if append else None)
+
+    start = time.perf_counter()
+    if workers > 1 and executor == "process":
+        fn = _encrypt_segment if encrypt else _decrypt_segment
+        tasks = ((aes_key, nonce(index, last, s0, s1), aad, bytes(src[s0:s1]))
+                 for index, last, s0, s1, _ in spans())
+        for (_, _, _, _, d0), out in zip(spans(), _ordered_map(fn, tasks, workers, executor)):
+            dst[d0:d0 + len(out)] = out
+            stats.advance(len(out) - AES_TAG_LEN if encrypt else len(out))
+    else:
+        fn = _seal_segment_to if encrypt else _open_segment_to
+        delta = AES_TAG_LEN if encrypt else -AES_TAG_LEN
+        tasks = ((aes_key, nonce(index, last, s0, s1), aad,
+                  src[s0:s1], dst[d0:d0 + (s1 - s0) + delta])
+                 for index, last, s0, s1, d0 in spans())
+        for out in _ordered_map(fn, tasks, workers, executor):
+            stats.advance(len(out) - AES_TAG_LEN if encrypt else len(out))
+    stats.add("crypt", time.perf_counter() - start)
+
+def _encrypt_file_mmap(in_path: str, out_path: str, keyword_for_transpose: str, version: int,
+                       segment_size: int, workers: int, executor: str, chunk_size, stats: HybridStats):
+    """
+    Enkripsi dengan input dan output di-mmap: kernel mengurus readahead, slice
+    memoryview input langsung masuk ke AES-GCM dan hasilnya ditulis ke file
+    output yang ukurannya sudah dihitung di depan.
+    """
+    total = os.path.getsize(in_path)
+    aes_key = get_random_bytes(32) # AES-256 (32 byte)
+    nonce = get_random_bytes(AES_NONCE_LEN)
+    header = _new_header(version, aes_key, keyword_for_transpose, nonce, segment_size)
+    if version == VERSION_V1:
+        count = 1
+    else:
+        count = max(1, -(-total // segment_size))
+    out_size = len(header) + total + count * AES_TAG_LEN
+
+    fin = in_map = fout = out_map = None
+    try:
+        fin = open(in_path, 'rb')
+        # mmap tidak bisa memetakan file kosong
+        in_map = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) if total else None
+        fout, out_map = _map_output(out_path, out_size)
+        with memoryview(out_map) as dst:
+            dst[:len(header)] = header
+            with (memoryview(in_map) if in_map is not None else memoryview(b'')) as src:
+                if version == VERSION_V1:
+                    cipher = AES.new(aes_key, AES.MODE_GCM, nonce=nonce)
+                    step = chunk_size or _pick_chunk_size(fin)
+                    base = len(header)
+                    start = time.perf_counter()
+                    for pos in range(0, total, step):
+                        end = min(pos + step, total)
+                        cipher.encrypt(src[pos:end], output=dst[base + pos:base + end])
+                        stats.advance(end - pos)
+                    dst[base + total:] = cipher.digest()
+                    stats.add("crypt", time.perf_counter() - start)
+                else:
+                    if total <= segment_size:
+                        workers = 1
+                    def spans():
+                        for index in range(count):
+                            s0 = index * segment_size
+                            s1 = min(s0 + segment_size, total)
+                            yield index, index == count - 1, s0, s1, len(header) + index * (segment_size + AES_TAG_LEN)
+                    _map_segments(src, dst, spans, aes_key, nonce, _segment_aad(version, segment_size, FLAG_KEYCHECK),
+                                  True, workers, executor, stats)
+    except BaseException as e:
+        _release_frames(e)
+        raise
+    finally:
+        _close_maps(in_map, fin, out_map, fout)
+
+def _decrypt_payload_mmap(fin, temp_out_path: str, header: HybrHeader, aes_key: bytes, total: int,
+                          workers: int, executor: str, chunk_size, stats: HybridStats):
+    """Dekripsi payload dengan mmap: batas ciphertext dihitung dari layout, output dipetakan ke memori."""
+    if header.version == VERSION_V1:
+        plain_size = total - header.header_size - AES_TAG_LEN
+        if plain_size < 0:
+            raise ValueError("File korup (terlalu pendek untuk berisi data dan tag)")
+    else:
+        count, last_len = _v2_layout(header, total)
+        plain_size = total - header.header_size - count * AES_TAG_LEN
+        if count == 1:
+            workers = 1
+
+    in_map = fout = out_map = None
+    try:
+        in_map = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        if plain_size:
+            fout, out_map = _map_output(temp_out_path, plain_size)
+        else:
+            fout = open(temp_out_path, 'wb') # mmap tidak bisa memetakan file kosong
+        with memoryview(in_map) as src, (memoryview(out_map) if out_map is not None else memoryview(bytearray())) as dst:
+            base = header.header_size
+            if header.version == VERSION_V1:
+                cipher = AES.new(aes_key, AES.MODE_GCM, nonce=header.nonce)
+                step = chunk_size or _pick_chunk_size(fin)
+                start = time.perf_counter()
+                for pos in range(0, plain_size, step):
+                    end = min(pos + step, plain_size)
+                    cipher.decrypt(src[base + pos:base + end], output=dst[pos:end])
+                    stats.advance(end - pos)
+                t0 = time.perf_counter()
+                stats.add("crypt", t0 - start)
+                # Verifikasi Tag (PENTING!)
+                cipher.verify(src[base + plain_size:])
+                stats.add("verify", time.perf_counter() - t0)
+            else:
+                full = header.segment_size + AES_TAG_LEN
+                def spans():
+                    for index in range(count):
+                        s0 = base + index * full
+                        s1 = s0 + (last_len if index == count - 1 else full)
+                        yield index, index == count - 1, s0, s1, index * header.segment_size
+                _map_segments(src, dst, spans, aes_key, header.nonce,
+                              _segment_aad(header.version, header.segment_size, header.flags),
+                              False, workers, executor, stats, bool(header.flags & FLAG_APPEND))
+    except BaseException as e:
+        _release_frames(e)
+        raise
+    finally:
+        _close_maps(in_map, out_map, fout)
+
+# ---------- Akses Acak (Random Access) untuk File v2 ----------
+class HybrReader(io.RawIOBase):
+    """
+    File-like read-only yang bisa di-seek atas plaintext file .hybr v2.
+
+    Posisi plaintext dipetakan langsung ke segmen lewat ukuran segmen di header,
+    jadi read() hanya membaca, mendekripsi, dan memverifikasi segmen yang
+    mencakup rentang yang diminta. Segmen terakhir yang didekripsi di-cache
+    agar pembacaan berurutan kecil-kecil tidak mendekripsi ulang segmen yang sama.
+    """
+
+    def __init__(self, path: str, keyword_for_transpose: str):
+        super().__init__()
+        self._fin = open(path, 'rb')
+        try:
+            self._header = _read_header(self._fin)
+            if self._header.version != VERSION_V2:
+                raise ValueError("Akses acak hanya didukung untuk file .hybr versi 2 (tersegmentasi)")
+            if _codec_name(self._header.flags):
+                raise ValueError("Akses acak tidak didukung untuk file .hybr terkompresi")
+            self._aes_key = _header_key(self._header, keyword_for_transpose)
+            total = os.fstat(self._fin.fileno()).st_size
+            self._count, last_len = _v2_layout(self._header, total)
+        except Exception:
+            self._fin.close()
+            raise
+        self._aad = _segment_aad(self._header.version, self._header.segment_size, self._header.flags)
+        self._size = (self._count - 1) * self._header.segment_size + last_len - AES_TAG_LEN
+        self._pos = 0
+        self._cached_index = -1
+        self._cached_plain = b''
+
+    @property
+    def size(self) -> int:
+        """Ukuran plaintext total (byte)."""
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"whence tidak valid ({whence})")
+        if pos < 0:
+            raise ValueError("Posisi seek negatif")
+        self._pos = pos
+        return pos
+
+    def _segment(self, index: int) -> bytes:
+        """Plaintext segmen ke-index (sudah diverifikasi tag-nya)."""
+        if index != self._cached_index:
+            full = self._header.segment_size + AES_TAG_LEN
+            last = index == self._count - 1
+            want = self._size - index * self._header.segment_size + AES_TAG_LEN if last else full
+            self._fin.seek(self._header.header_size + index * full)
+            sealed = self._fin.read(want)
+            if len(sealed) != want:
+                raise ValueError("File berakhir secara tak terduga saat membaca ciphertext")
+            nonce = _segment_nonce(self._header.nonce, index, last,
+                                   want - AES_TAG_LEN if self._header.flags & FLAG_APPEND else None)
+            try:
+                self._cached_plain = _decrypt_segment(self._aes_key, nonce, self._aad, sealed)
+            except ValueError:
+                raise ValueError(f"Dekripsi Gagal (Keyword salah atau file telah dimodifikasi): Integritas segmen {index} terganggu.")
+            self._cached_index = index
+        return self._cached_plain
+
+    def readinto(self, b) -> int:
+        out = memoryview(b).cast('B')
+        n = max(0, min(len(out), self._size - self._pos))
+        done = 0
+        seg_size = self._header.segment_size
+        while done < n:
+            index, start = divmod(self._pos, seg_size)
+            plain = self._segment(index)
+            take = min(n - done, len(plain) - start)
+            out[done:done + take] = plain[start:start + take]
+            done += take
+            self._pos += take
+        return done
+
+    def close(self):
+        if not self.closed:
+            self._fin.close()
+            self._cached_plain = b''
+        super().close()
+
+def decrypt_range(path: str, keyword_for_transpose: str, offset: int, length: int) -> bytes:
+    """
+    Dekripsi `length` byte plaintext mulai dari `offset` tanpa mendekripsi seluruh file.
+    Hanya segmen yang mencakup rentang tersebut yang dibaca dan diotentikasi.
+    Hasil bisa lebih pendek dari `length` jika rentang melewati akhir file.
+    """
+    if offset < 0 or length < 0:
+        raise ValueError("offset dan length tidak boleh negatif")
+    with HybrReader(path, keyword_for_transpose) as reader:
+        reader.seek(offset)
+        return reader.read(length)
+
+
+# ---------- Rekey (ganti keyword tanpa enkripsi ulang payload) ----------
+def _match_key_payload(fin, header: HybrHeader, aes_keys, total: int) -> int:
+    """
+    Index kunci pertama di `aes_keys` yang mengotentikasi payload, untuk file tanpa KCV.
+    Semua kandidat diperiksa dalam satu kali baca dan tidak ada yang ditulis.
+    v2: cukup otentikasi segmen pertama. v1: tag hanya ada di akhir, jadi seluruh
+    payload harus dibaca. Melempar ValueError("MAC check failed") jika tidak ada yang cocok.
+    """
+    if header.version == VERSION_V2:
+        count, last_len = _v2_layout(header, total)
+        fin.seek(header.header_size)
+        sealed = _read_exact(fin, last_len if count == 1 else header.segment_size + AES_TAG_LEN)
+        tail_len = len(sealed) - AES_TAG_LEN if header.flags & FLAG_APPEND else None
+        nonce = _segment_nonce(header.nonce, 0, count == 1, tail_len)
+        aad = _segment_aad(header.version, header.segment_size, header.flags)
+        for i, aes_key in enumerate(aes_keys):
+            try:
+                _decrypt_segment(aes_key, nonce, aad, sealed)
+                return i
+            except ValueError:
+                continue
+        raise ValueError("MAC check failed")
+    ciphertext_size = total - header.header_size - AES_TAG_LEN
+    if ciphertext_size < 0:
+        raise ValueError("File korup (terlalu pendek untuk berisi data dan tag)")
+    ciphers = [AES.new(aes_key, AES.MODE_GCM, nonce=header.nonce) for aes_key in aes_keys]
+    buf = memoryview(bytearray(MAX_CHUNK))
+    scratch = memoryview(bytearray(MAX_CHUNK)) # Plaintext dibuang; yang dibutuhkan hanya tag
+    fin.seek(header.header_size)
+    left = ciphertext_size
+    while left:
+        n = _readinto_full(fin, buf[:min(left, len(buf))])
+        if not n:
+            raise ValueError("File berakhir secara tak terduga saat membaca ciphertext")
+        for cipher in ciphers:
+            cipher.decrypt(buf[:n], output=scratch[:n])
+        left -= n
+    tag = _read_exact(fin, AES_TAG_LEN)
+    for i, cipher in enumerate(ciphers):
+        try:
+            cipher.verify(tag)
+            return i
+        except ValueError:
+            continue
+    raise ValueError("MAC check failed")
+
+def _verify_key_payload(fin, header: HybrHeader, aes_key: bytes, total: int):
+    """
+    Pastikan kunci hasil unwrap benar untuk file tanpa KCV, sebelum header ditimpa
+    (kunci salah yang ter-wrap ulang membuat file tidak bisa didekripsi lagi).
+    """
+    _match_key_payload(fin, header, [aes_key], total)
+
+def match_keyword(in_path: str, keywords, verify: bool = True) -> int:
+    """
+    Index keyword pertama di `keywords` yang membuka file .hybr, tanpa menulis apa pun.
+    Dengan KCV cukup header; tanpa KCV payload diverifikasi sekali untuk semua kandidat
+    (kecuali `verify=False`, lalu keyword dengan hasil unwrap valid dianggap cocok).
+    Melempar ValueError jika tidak ada yang cocok.
+    """
+    total = os.path.getsize(in_path)
+    with open(in_path, 'rb') as fin:
+        header = _read_header(fin)
+        candidates = [] # (index keyword, kunci AES)
+        for i, keyword in enumerate(keywords):
+            try:
+                candidates.append((i, _header_key(header, keyword)))
+            except ValueError:
+                continue
+        if not candidates:
+            raise ValueError("Keyword Myszkowski salah (tidak ada keyword yang cocok dengan header)")
+        if not verify or header.flags & FLAG_KEYCHECK:
+            return candidates[0][0]
+        try:
+            match = _match_key_payload(fin, header, [aes_key for _, aes_key in candidates], total)
+        except ValueError as e:
+            if "MAC check failed" in str(e):
+                raise ValueError("Keyword salah atau file telah dimodifikasi (tag GCM tidak cocok).")
+            raise
+        return candidates[match][0]
+
+def _copy_range(fin, fout, offset: int, count: int):
+    """
+    Salin `count` byte mulai `offset` dari fin ke posisi fout saat ini. Memakai
+    os.copy_file_range (zero-copy di kernel, reflink pada btrfs/XFS) jika tersedia,
+    selain itu loop readinto dengan satu buffer.
+    """
+    fout.flush()
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        src, dst = fin.fileno(), fout.fileno()
+        dst_offset = fout.tell()
+        done = 0
+        try:
+            while done < count:
+                n = copy_file_range(src, dst, min(count - done, 1 << 30), offset + done, dst_offset + done)
+                if not n:
+                    raise ValueError("File berakhir secara tak terduga saat menyalin payload")
+                done += n
+            fout.seek(dst_offset + count)
+            return
+        except OSError:
+            # Filesystem/kernel tidak mendukung (mis. EXDEV, ENOSYS): lanjutkan dengan salinan biasa
+            offset, count = offset + done, count - done
+            fout.seek(dst_offset + done)
+    buf = memoryview(bytearray(MAX_CHUNK))
+    fin.seek(offset)
+    while count:
+        n = _readinto_full(fin, buf[:min(count, len(buf))])
+        if not n:
+            raise ValueError("File berakhir secara tak terduga saat menyalin payload")
+        fout.write(buf[:n])
+        count -= n
+
+def rekey_file(in_path: str, old_keyword: str, new_keyword: str, out_path: str = None,
+               verify: bool = True) -> HybrHeader:
+    """
+    Ganti keyword file .hybr hanya dengan menulis ulang header: kunci AES sesi
+    di-unwrap dengan keyword lama lalu di-wrap dengan keyword baru, payload tetap
+    byte-per-byte sama. Tanpa `out_path`, header ditimpa in-place (ukurannya tidak
+    berubah); dengan `out_path`, payload disalin ke file baru (zero-copy jika bisa).
+
+    Keyword lama diperiksa lewat KCV. File tanpa KCV (v1 / v2 lama) diverifikasi
+    dengan mendekripsi segmen pertama (v2) atau seluruh payload (v1) kecuali
+    `verify=False`. Mengembalikan header baru.
+    """
+    if not new_keyword:
+        raise ValueError("Keyword diperlukan untuk Myszkowski")
+    total = os.path.getsize(in_path)
+    with open(in_path, 'rb') as fin:
+        header = _read_header(fin)
+        aes_key = _header_key(header, old_keyword)
+        if verify and not header.flags & FLAG_KEYCHECK:
+            try:
+                _verify_key_payload(fin, header, aes_key, total)
+            except ValueError as e:
+                if "MAC check failed" in str(e):
+                    raise ValueError("Keyword lama salah atau file telah dimodifikasi: rekey dibatalkan.")
+                raise
+
+        key_cipher_bytes = _wrap_key(aes_key, new_keyword)
+        key_check = b''
+        if header.flags & FLAG_KEYCHECK:
+            key_check = _key_check(aes_key, header.version, key_cipher_bytes, header.nonce,
+                                   header.segment_size, header.flags)
+        new_header = _build_header(header.version, key_cipher_bytes, header.nonce,
+                                   header.segment_size, header.flags, key_check)
+
+        if out_path is not None:
+            temp_out_path = out_path + ".tmp_rekey"
+            try:
+                with open(temp_out_path, 'wb') as fout:
+                    fout.write(new_header)
+                    _copy_range(fin, fout, header.header_size, total - header.header_size)
+                os.replace(temp_out_path, out_path)
+            except BaseException:
+                if os.path.exists(temp_out_path):
+                    os.remove(temp_out_path)
+                raise
+            return _read_header(io.BytesIO(new_header))
+
+    if len(new_header) != header.header_size:
+        # Tidak terjadi untuk kunci hex 64 karakter, tapi jangan pernah menggeser payload
+        raise ValueError("Ukuran header berubah; gunakan out_path untuk rekey ke file baru")
+    # Satu write kecil di awal file, lalu fsync agar header baru benar-benar tersimpan
+    with open(in_path, 'r+b') as f:
+        f.write(new_header)
+        f.flush()
+        os.fsync(f.fileno())
+    return _read_header(io.BytesIO(new_header))
+
+# ---------- Append (Rekaman yang Terus Bertambah) ----------
+def _read_journal(path: str):
+    """
+    (indeks segmen awal, ukuran input target, SHA-256 hex input[indeks*segmen:target])
+    dari append yang terputus, atau None jika tidak ada journal.
+    """
+    try:
+        with open(path, encoding='ascii') as f:
+            index, target_size, digest = f.read().split()
+            return int(index), int(target_size), digest
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        raise ValueError(f"Journal append rusak ({path})")
+
+def _write_journal(path: str, index: int, target_size: int, digest: str):
+    """Tulis journal secara atomik (file sementara + fsync + rename) sebelum segmen ditimpa."""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='ascii') as f:
+        f.write(f"{index} {target_size} {digest}")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def _input_digest(in_path: str, start: int, stop: int, check=None) -> str:
+    """
+    SHA-256 hex dari input[start:stop]. Dengan `check` = (posisi, digest hex), pastikan
+    juga input[start:posisi] sama dengan isi yang dicatat journal (satu kali baca).
+    """
+    import hashlib
+    h = hashlib.sha256()
+    buf = memoryview(bytearray(MAX_CHUNK))
+    with open(in_path, 'rb') as fin:
+        fin.seek(start)
+        pos = start
+        while pos < stop:
+            limit = stop if check is None or pos >= check[0] else check[0]
+            n = _readinto_full(fin, buf[:min(limit - pos, len(buf))])
+            if not n:
+                raise ValueError("Input menyusut saat di-append (file input harus hanya bertambah)")
+            h.update(buf[:n])
+            pos += n
+            if check is not None and pos == check[0] and h.hexdigest() != check[1]:
+                raise ValueError("Input berubah sejak append yang terputus; append dibatalkan agar nonce "
+                                 "GCM tidak dipakai ulang untuk plaintext berbeda. Kembalikan input semula.")
+    return h.hexdigest()
+
+def _seal_appended(fin, fout, aes_key: bytes, base_nonce: bytes, aad: bytes, segment_size: int,
+                   index: int, count: int, stats: HybridStats):
+    """
+    Enkripsi tepat `count` byte dari fin sebagai segmen ke-`index` dan seterusnya:
+    segmen penuh, lalu satu segmen terakhir yang panjangnya diikat ke nonce (FLAG_APPEND).
+    """
+    buf = memoryview(bytearray(segment_size + AES_TAG_LEN))
+    clock = time.perf_counter
+    while True:
+        n = min(segment_size, count)
+        t0 = clock()
+        if _readinto_full(fin, buf[:n]) != n:
+            raise ValueError("Input menyusut saat di-append (file input harus hanya bertambah)")
+        t1 = clock()
+        last = n == count
+        out = _seal_segment_to(aes_key, _segment_nonce(base_nonce, index, last, n), aad, buf[:n], buf)
+        t2 = clock()
+        fout.write(out)
+        t3 = clock()
+        stats.add("read", t1 - t0)
+        stats.add("crypt", t2 - t1)
+        stats.add("write", t3 - t2)
+        stats.advance(n)
+        if last:
+            return
+        index += 1
+        count -= n
+
+def append_file_hybrid(in_path: str, out_path: str, keyword_for_transpose: str,
+                       segment_size: int = SEGMENT_SIZE, progress=None) -> HybridStats:
+    """
+    Tambahkan byte baru dari `in_path` (file yang terus ditulis, mis. rekaman kamera)
+    ke file .hybr appendable `out_path` sebagai segmen terotentikasi baru. Jika
+    `out_path` belum ada, file dibuat (v2 dengan FLAG_APPEND; `segment_size` hanya
+    dipakai saat itu).
+
+    Hanya segmen terakhir (yang boleh tidak penuh) yang didekripsi, dicocokkan dengan
+    input, lalu ditulis ulang bersama data baru; segmen penuh sebelumnya tidak
+    disentuh, jadi biaya append sebanding dengan data baru. Setelah setiap append
+    selesai file bisa didekripsi seperti file v2 biasa.
+
+    Input harus hanya bertambah (append-only) dan hanya boleh ada satu penulis per
+    file .hybr. Selama append berjalan, journal `<out_path>.append-journal` mencatat
+    segmen yang sedang ditimpa beserta SHA-256 input yang dienkripsi; jika proses
+    terputus, panggil lagi dengan input yang sama. Pemulihan menolak (ValueError)
+    input yang berbeda dari yang dicatat, karena menulis ulang segmen dengan nonce
+    yang sama untuk plaintext lain membocorkan XOR kedua plaintext.
+    """
+    if not keyword_for_transpose:
+        raise ValueError("Keyword diperlukan untuk Myszkowski")
+    source_size = os.path.getsize(in_path)
+    journal_path = out_path + APPEND_JOURNAL_SUFFIX
+
+    if not os.path.exists(out_path):
+        if os.path.exists(journal_path):
+            os.remove(journal_path) # Sisa append terputus dari file .hybr lama yang sudah dihapus
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+            raise ValueError(f"Ukuran segmen harus 1..{MAX_SEGMENT_SIZE} byte")
+        stats = HybridStats(source_size, progress)
+        aes_key = get_random_bytes(32) # AES-256 (32 byte)
+        base_nonce = get_random_bytes(AES_NONCE_LEN)
+        header = _new_header(VERSION_V2, aes_key, keyword_for_transpose, base_nonce, segment_size, FLAG_APPEND)
+        aad = _segment_aad(VERSION_V2, segment_size, FLAG_KEYCHECK | FLAG_APPEND)
+        temp_out_path = out_path + ".tmp_append"
+        try:
+            with open(in_path, 'rb') as fin, open(temp_out_path, 'wb') as fout:
+                fout.write(header)
+                _seal_appended(fin, fout, aes_key, base_nonce, aad, segment_size, 0, source_size, stats)
+            os.replace(temp_out_path, out_path)
+        except BaseException:
+            if os.path.exists(temp_out_path):
+                os.remove(temp_out_path)
+            raise
+        stats.finish()
+        return stats
+
+    total = os.path.getsize(out_path)
+    with open(out_path, 'r+b') as f:
+        header = _read_header(f)
+        if header.version != VERSION_V2 or not header.flags & FLAG_APPEND:
+            raise ValueError("File .hybr tidak dibuat dalam mode append (gunakan append_file_hybrid untuk membuatnya)")
+        aes_key = _header_key(header, keyword_for_transpose)
+        seg_size = header.segment_size
+        full = seg_size + AES_TAG_LEN
+        aad = _segment_aad(header.version, seg_size, header.flags)
+
+        journal = _read_journal(journal_path)
+        if journal is None:
+            # Dekripsi segmen terakhir dan pastikan input adalah kelanjutan plaintext yang sama
+            count, last_len = _v2_layout(header, total)
+            index = count - 1
+            f.seek(header.header_size + index * full)
+            sealed = _read_exact(f, last_len)
+            try:
+                tail = _decrypt_segment(aes_key, _segment_nonce(header.nonce, index, True, last_len - AES_TAG_LEN),
+                                        aad, sealed)
+            except ValueError:
+                raise ValueError(f"Dekripsi Gagal (Keyword salah atau file telah dimodifikasi): Integritas segmen {index} terganggu.")
+            plain_size = index * seg_size + len(tail)
+            if source_size < plain_size:
+                raise ValueError("Input lebih kecil dari plaintext file .hybr (bukan kelanjutan rekaman yang sama)")
+            with open(in_path, 'rb') as fin:
+                fin.seek(index * seg_size)
+                if fin.read(len(tail)) != tail:
+                    raise ValueError("Input tidak cocok dengan isi file .hybr (bukan kelanjutan rekaman yang sama)")
+            if source_size == plain_size:
+                stats = HybridStats(0, progress)
+                stats.finish()
+                return stats # Tidak ada data baru
+        else:
+            index, target_size, _ = journal
+            if header.header_size + index * full > total or not index * seg_size < target_size <= source_size:
+                raise ValueError("Journal append tidak cocok dengan file .hybr atau input")
+            if index:
+                # Segmen penuh sebelum `index` tidak ikut ditimpa: pastikan input masih rekaman yang sama
+                f.seek(header.header_size + (index - 1) * full)
+                try:
+                    prev = _decrypt_segment(aes_key, _segment_nonce(header.nonce, index - 1, False), aad,
+                                            _read_exact(f, full))
+                except ValueError:
+                    raise ValueError(f"Dekripsi Gagal (Keyword salah atau file telah dimodifikasi): Integritas segmen {index - 1} terganggu.")
+                with open(in_path, 'rb') as fin:
+                    fin.seek((index - 1) * seg_size)
+                    if fin.read(seg_size) != prev:
+                        raise ValueError("Input tidak cocok dengan isi file .hybr (bukan kelanjutan rekaman yang sama)")
+
+        # Segmen sebelum `index` tidak pernah ditimpa; journal dulu, baru segmen terakhir ditulis ulang.
+        # Saat pemulihan, digest juga memastikan input sama dengan yang sudah dienkripsi run terputus.
+        stats = HybridStats(source_size - index * seg_size, progress)
+        t0 = time.perf_counter()
+        digest = _input_digest(in_path, index * seg_size, source_size,
+                               journal and (journal[1], journal[2]))
+        stats.add("read", time.perf_counter() - t0)
+        _write_journal(journal_path, index, source_size, digest)
+        with open(in_path, 'rb') as fin:
+            fin.seek(index * seg_size)
+            f.seek(header.header_size + index * full)
+            _seal_appended(fin, f, aes_key, header.nonce, aad, seg_size, index,
+                           source_size - index * seg_size, stats)
+        t0 = time.perf_counter()
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+        stats.add("write", time.perf_counter() - t0)
+    os.remove(journal_path)
+    stats.finish()
+    return stats
+
+# ---------- Streaming (Pipe / Generator, tanpa file sementara) ----------
+def encrypt_stream(fin, fout, keyword_for_transpose: str, segment_size: int = SEGMENT_SIZE,
+                   workers: int = 1, executor: str = "thread", progress=None,
+                   compression: str = None) -> HybridStats:
+    """
+    Enkripsi dari file object `fin` ke `fout` dalam format v2 tanpa seek dan tanpa
+    mengetahui ukuran input (cocok untuk stdin/stdout). Memori konstan:
+    paling banyak (2x workers + 2) segmen berada di memori. Dengan `compression`,
+    hanya awal stream yang bisa dijadikan sampel untuk memutuskan kompresi.
+    """
+    if not keyword_for_transpose:
+        raise ValueError("Keyword diperlukan untuk Myszkowski")
+    if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+        raise ValueError(f"Ukuran segmen harus 1..{MAX_SEGMENT_SIZE} byte")
+    codec_flags = _codec_flags(compression)
+    stats = HybridStats(None, progress)
+    if codec_flags:
+        head = bytearray(COMPRESS_SAMPLE)
+        head = bytes(head[:_readinto_full(fin, memoryview(head))])
+        if not _worth_compressing([head]):
+            compression, codec_flags = None, 0
+        inner = HybridStats()
+        _encrypt_v2_stream(_CompressReader(fin, compression, stats, head), fout, keyword_for_transpose,
+                           segment_size, workers, executor, inner, flags=codec_flags)
+        for name, seconds in inner.phases.items():
+            stats.add(name, seconds)
+    else:
+        _encrypt_v2_stream(fin, fout, keyword_for_transpose, segment_size, workers, executor, stats)
+    stats.finish()
+    return stats
+
+def _encrypt_v2_stream(fin, fout, keyword_for_transpose: str, segment_size: int,
+                       workers: int, executor: str, stats: HybridStats, pipelined: bool = False,
+                       flags: int = 0):
+    """Inti encrypt_stream, juga dipakai encrypt_file_hybrid untuk format v2."""
+
+    # 1. Buat Kunci AES & Nonce dasar secara acak
+    aes_key = get_random_bytes(32) # AES-256 (32 byte)
+    base_nonce = get_random_bytes(AES_NONCE_LEN) # Nonce tiap segmen diturunkan dari sini
+
+    # 2. Enkripsi Kunci AES dengan Myszkowski, tulis header
+    fout.write(_new_header(VERSION_V2, aes_key, keyword_for_transpose, base_nonce, segment_size, flags))
+    aad = _segment_aad(VERSION_V2, segment_size, FLAG_KEYCHECK | flags)
+
+    # 3. Enkripsi per segmen
+    _pump_segments(fin, fout, aes_key, base_nonce, aad, segment_size, True, workers, executor, stats, pipelined)
+
+def decrypt_stream(fin, fout, keyword_for_transpose: str,
+                   workers: int = 1, executor: str = "thread", progress=None) -> HybridStats:
+    """
+    Dekripsi stream v2 dari `fin` ke `fout` tanpa seek dan tanpa file sementara.
+    Setiap segmen diverifikasi sebelum ditulis; jika segmen berikutnya rusak,
+    output yang sudah ditulis harus dianggap tidak lengkap (error dilempar).
+    """
+    header = _read_header(fin)
+    if header.version != VERSION_V2:
+        raise ValueError("Format v1 tidak mendukung streaming; gunakan decrypt_file_hybrid")
+    aes_key = _header_key(header, keyword_for_transpose)
+    aad = _segment_aad(header.version, header.segment_size, header.flags)
+    codec = _codec_name(header.flags)
+
+    stats = HybridStats(None, progress)
+    try:
+        sink = _DecompressWriter(fout, codec) if codec else fout
+        _pump_segments(fin, sink, aes_key, header.nonce, aad, header.segment_size + AES_TAG_LEN,
+                       False, workers, executor, stats, append=bool(header.flags & FLAG_APPEND))
+        if codec:
+            sink.finish()
+    except ValueError as e:
+        if "MAC check failed" in str(e):
+            raise ValueError("Dekripsi Gagal (Keyword salah atau file telah dimodifikasi): Integritas data terganggu.")
+        raise
+    stats.finish()
+    return stats
+
+class StreamEncryptor:
+    """
+    Enkriptor v2 bergaya push: update(data) mengembalikan byte ciphertext yang
+    siap dikirim, finalize() menutup stream. Satu segmen selalu ditahan sampai
+    diketahui apakah itu segmen terakhir.
+
+    iter_update()/iter_finalize() tidak menyalin: setiap segmen disegel in-place di
+    satu buffer (segmen + tag) dan dihasilkan sebagai memoryview ke buffer itu, yang
+    ditimpa saat iterator dilanjutkan. Kirim/salin setiap potongan sebelum mengambil
+    potongan berikutnya, dan habiskan iteratornya sebelum memanggil update berikutnya.
+    """
+
+    def __init__(self, keyword_for_transpose: str, segment_size: int = SEGMENT_SIZE):
+        if not keyword_for_transpose:
+            raise ValueError("Keyword diperlukan untuk Myszkowski")
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+            raise ValueError(f"Ukuran segmen harus 1..{MAX_SEGMENT_SIZE} byte")
+        self._aes_key = get_random_bytes(32)
+        self._base_nonce = get_random_bytes(AES_NONCE_LEN)
+        self._segment_size = segment_size
+        self._aad = _segment_aad(VERSION_V2, segment_size, FLAG_KEYCHECK)
+        self._pending = _new_header(VERSION_V2, self._aes_key, keyword_for_transpose,
+                                    self._base_nonce, segment_size)
+        self._buf = bytearray(segment_size + AES_TAG_LEN) # Plaintext segmen berjalan, disegel in-place
+        self._fill = 0
+        self._index = 0
+        self._draining = None
+        self._finished = False
+
+    def _seal(self, last: bool) -> memoryview:
+        nonce = _segment_nonce(self._base_nonce, self._index, last)
+        self._index += 1
+        view = memoryview(self._buf)
+        return _seal_segment_to(self._aes_key, nonce, self._aad, view[:self._fill], view)
+
+    def _check_state(self):
+        if self._finished:
+            raise ValueError("Stream sudah di-finalize")
+        if self._draining is not None and self._draining.gi_frame is not None:
+            raise ValueError("Iterator update sebelumnya belum dihabiskan")
+
+    def update(self, data) -> bytes:
+        return self._collect(self.iter_update(data))
+
+    def finalize(self) -> bytes:
+        return self._collect(self.iter_finalize())
+
+    @staticmethod
+    def _collect(pieces) -> bytes:
+        out = bytearray() # Salin per potongan: setiap memoryview ditimpa oleh potongan berikutnya
+        for piece in pieces:
+            out += piece
+        return bytes(out)
+
+    def iter_update(self, data):
+        """Iterator potongan ciphertext untuk `data`; `data` dibaca selama iterator berjalan."""
+        self._check_state()
+        self._draining = self._drain(data)
+        return self._draining
+
+    def _drain(self, data):
+        if self._pending:
+            yield self._pending
+            self._pending = b''
+        with memoryview(data) as src, src.cast('B') as src:
+            pos = 0
+            while pos < len(src):
+                if self._fill == self._segment_size:
+                    # Masih ada data setelah segmen penuh ini, jadi ini bukan segmen terakhir
+                    yield self._seal(last=False)
+                    self._fill = 0
+                n = min(self._segment_size - self._fill, len(src) - pos)
+                self._buf[self._fill:self._fill + n] = src[pos:pos + n]
+                self._fill += n
+                pos += n
+
+    def iter_finalize(self):
+        """Segel segmen terakhir; iterator berisi sisa ciphertext."""
+        self._check_state()
+        self._finished = True
+        return self._emit_last()
+
+    def _emit_last(self):
+        if self._pending:
+            yield self._pending
+            self._pending = b''
+        yield self._seal(last=True)
+        self._fill = 0
+
+class StreamDecryptor:
+    """
+    Dekriptor v2 bergaya push. update(data) hanya mengembalikan plaintext dari
+    segmen yang tag-nya sudah terverifikasi; finalize() memverifikasi segmen
+    terakhir dan memastikan stream tidak terpotong.
+
+    Stream terkompresi bisa mengembang jauh melebihi input (363 byte ciphertext bisa
+    menjadi ratusan MB), jadi update()/finalize() yang mengembalikan satu objek bytes
+    tidak berbatas. iter_update()/iter_finalize() menghasilkan potongan paling besar
+    max(ukuran segmen, MAX_CHUNK); habiskan iteratornya sebelum memanggil update berikutnya.
+
+    Ukuran segmen (dan karena itu buffer internal) ditentukan header yang diterima;
+    `max_segment_size` menolak header dengan segmen lebih besar (mis. input tak tepercaya).
+    """
+
+    def __init__(self, keyword_for_transpose: str, max_segment_size: int = MAX_SEGMENT_SIZE):
+        self._keyword = keyword_for_transpose
+        self._max_segment_size = max_segment_size
+        self._header = None
+        self._decompress = None
+        self._buf = bytearray()
+        self._index = 0
+        self._finished = False
+
+    def _parse_header(self) -> bool:
+        if len(self._buf) < len(MAGIC):
+            return False
+        reader = io.BytesIO(self._buf)
+        try:
+            header = _read_header(reader)
+        except _TruncatedHeader:
+            return False
+        if header.version != VERSION_V2:
+            raise ValueError("Format v1 tidak mendukung streaming; gunakan decrypt_file_hybrid")
+        if header.segment_size > self._max_segment_size:
+            raise ValueError(f"Ukuran segmen {header.segment_size} byte melebihi batas {self._max_segment_size} byte")
+        self._aes_key = _header_key(header, self._keyword)
+        self._aad = _segment_aad(header.version, header.segment_size, header.flags)
+        self._full = header.segment_size + AES_TAG_LEN
+        codec = _codec_name(header.flags)
+        if codec:
+            self._decompress = _DecompressWriter(None, codec)
+        self._header = header
+        del self._buf[:header.header_size]
+        return True
+
+    def _emit(self, plain):
+        """Plaintext untuk pemanggil per potongan (didekompresi jika file terkompresi)."""
+        if self._decompress is None:
+            if plain:
+                yield plain
+            return
+        yield from self._decompress.iter_decompress(plain)
+
+    def _open(self, sealed, last: bool) -> bytes:
+        tail_len = len(sealed) - AES_TAG_LEN if self._header.flags & FLAG_APPEND else None
+        nonce = _segment_nonce(self._header.nonce, self._index, last, tail_len)
+        try:
+            plain = _decrypt_segment(self._aes_key, nonce, self._aad, bytes(sealed))
+        except ValueError:
+            raise ValueError(f"Dekripsi Gagal (Keyword salah atau file telah dimodifikasi): Integritas segmen {self._index} terganggu.")
+        self._index += 1
+        return plain
+
+    def update(self, data) -> bytes:
+        return b''.join(self.iter_update(data))
+
+    def finalize(self) -> bytes:
+        return b''.join(self.iter_finalize())
+
+    def iter_update(self, data):
+        """Tampung `data` sekarang; iterator yang dikembalikan mendekripsi segmen lengkap satu per satu."""
+        if self._finished:
+            raise ValueError("Stream sudah di-finalize")
+        self._buf += data
+        if self._header is None and not self._parse_header():
+            return iter(())
+        return self._drain()
+
+    def _drain(self):
+        # Sisakan minimal 1 byte setelah segmen: segmen terakhir baru diketahui saat finalize()
+        while len(self._buf) > self._full:
+            with memoryview(self._buf) as view:
+                plain = self._open(view[:self._full], last=False)
+            del self._buf[:self._full]
+            yield from self._emit(plain)
+
+    def iter_finalize(self):
+        """Verifikasi segmen terakhir sekarang; iterator yang dikembalikan berisi sisa plaintext."""
+        if self._finished:
+            raise ValueError("Stream sudah di-finalize")
+        self._finished = True
+        if self._header is None:
+            raise ValueError("File korup (header terpotong)")
+        if len(self._buf) < AES_TAG_LEN:
+            raise ValueError("File korup (terlalu pendek untuk berisi data dan tag)")
+        plain = self._open(self._buf, last=True)
+        self._buf = bytearray()
+        return self._emit_last(plain)
+
+    def _emit_last(self, plain):
+        yield from self._emit(plain)
+        if self._decompress is not None:
+            self._decompress.finish()
+
+def iter_encrypt(chunks, keyword_for_transpose: str, segment_size: int = SEGMENT_SIZE):
+    """Generator: terima iterable berisi potongan plaintext, hasilkan potongan ciphertext v2."""
+    encryptor = StreamEncryptor(keyword_for_transpose, segment_size)
+    for chunk in chunks:
+        out = encryptor.update(chunk)
+        if out:
+            yield out
+    yield encryptor.finalize()
+
+def iter_decrypt(chunks, keyword_for_transpose: str):
+    """Generator: terima iterable berisi potongan ciphertext v2, hasilkan plaintext terverifikasi."""
+    decryptor = StreamDecryptor(keyword_for_transpose)
+    for chunk in chunks:
+        yield from decryptor.iter_update(chunk)
+    yield from decryptor.iter_finalize()
\ No newline at end of file
@@ -0,0 +1,86 @@
+# download_server.py
+"""
+Server download kecil untuk streamlit_app.py.
+
+st.download_button menyimpan seluruh data di memori server, dan static serving
+Streamlit menolak file di atas 200 MB. Hasil besar karena itu disajikan lewat
+HTTP server stdlib di thread terpisah yang membaca file per chunk dari cache.
+
+Link berisi token acak yang menunjuk ke path di cache (bukan salinan/hard link),
+sehingga eviction ResultCache tetap membebaskan ruang disk: artefak yang sudah
+dihapus cukup menghasilkan 404. Token kedaluwarsa setelah `ttl` detik.
+"""
+import os
+import secrets
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+COPY_CHUNK = 1024 * 1024  # File dikirim per 1MB
+
+class DownloadServer:
+    """HTTP server yang menyajikan file cache lewat token `/dl/<token>`."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, ttl: float = 3600,
+                 public_url: str = None):
+        self.ttl = ttl
+        self._links = {}  # token -> (path, nama file, waktu kedaluwarsa)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        bound_host, bound_port = self._httpd.server_address[:2]
+        self.public_url = (public_url or f"http://{bound_host}:{bound_port}").rstrip("/")
+        threading.Thread(target=self._httpd.serve_forever, name="download-server", daemon=True).start()
+
+    def publish(self, path: str, file_name: str) -> str:
+        """Daftarkan `path` dan kembalikan URL download-nya."""
+        now = time.time()
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            for old in [t for t, (_, _, expires) in self._links.items() if expires < now]:
+                del self._links[old]
+            self._links[token] = (path, os.path.basename(file_name), now + self.ttl)
+        return f"{self.public_url}/dl/{token}"
+
+    def lookup(self, token: str):
+        """(path, nama file) untuk token yang masih berlaku, selain itu None."""
+        with self._lock:
+            link = self._links.get(token)
+        if link is None or link[2] < time.time():
+            return None
+        return link[0], link[1]
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+def _make_handler(server: DownloadServer):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.split("?", 1)[0].split("/")
+            link = server.lookup(parts[2]) if len(parts) == 3 and parts[1] == "dl" else None
+            try:
+                f = open(link[0], "rb") if link else None
+            except FileNotFoundError:
+                f = None # Artefak sudah di-evict dari cache
+            if f is None:
+                self.send_error(404)
+                return
+            with f:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+                self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(link[1])}")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                try:
+                    shutil.copyfileobj(f, self.wfile, COPY_CHUNK)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # Browser membatalkan download
+
+        def log_message(self, format, *args):
+            pass # Jangan kotori log Streamlit
+
+    return Handler
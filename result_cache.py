@@ -0,0 +1,127 @@
+# result_cache.py
+"""
+Cache hasil proses (file .hybr / hasil dekripsi) di disk untuk streamlit_app.py.
+
+Kunci cache = (digest input, mode, sidik jari keyword). Sidik jari keyword adalah
+HMAC dengan secret acak milik direktori cache, sehingga keyword tidak pernah
+tersimpan dan tidak bisa ditebak offline dari nama file. Ukuran total dibatasi;
+entri yang paling lama tidak dipakai (mtime) dihapus lebih dulu (LRU).
+
+Cache berisi plaintext hasil dekripsi, jadi direktorinya harus milik user yang
+menjalankan server dengan mode 0700, dan secret ditulis dengan mode 0600.
+"""
+import hashlib
+import hmac
+import os
+import stat
+import tempfile
+import time
+
+RESULT_SUFFIX = ".result"    # Artefak hasil yang sudah selesai
+PARTIAL_SUFFIX = ".partial"  # Output yang sedang ditulis
+UPLOAD_SUFFIX = ".upload"    # Spool file upload
+STALE_SECONDS = 6 * 3600     # File .partial/.upload yang lebih tua dianggap sisa sesi lama
+_SECRET_NAME = ".secret"
+
+class ResultCache:
+    """Direktori cache dengan batas ukuran total `max_bytes`."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        _check_private_dir(directory)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._secret = self._load_secret()
+
+    def _load_secret(self) -> bytes:
+        path = os.path.join(self.directory, _SECRET_NAME)
+        try:
+            with open(path, 'rb') as f:
+                secret = f.read()
+            # Secret dari versi lama (0644) mungkin sudah terbaca user lain: buat yang baru
+            if os.stat(path).st_mode & 0o077:
+                secret = b''
+        except FileNotFoundError:
+            secret = b''
+        if len(secret) != 32:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=_SECRET_NAME) # mkstemp: mode 0600
+            with os.fdopen(fd, 'wb') as f:
+                f.write(os.urandom(32))
+            os.replace(tmp, path)
+            # Jika dua proses membuat secret bersamaan, yang terakhir menang; baca ulang
+            with open(path, 'rb') as f:
+                secret = f.read()
+        return secret
+
+    def key(self, input_digest: str, mode: str, keyword: str) -> str:
+        """Kunci cache untuk (digest input, mode, sidik jari keyword)."""
+        fingerprint = hmac.new(self._secret, keyword.encode('utf-8'), hashlib.sha256).hexdigest()
+        return hashlib.sha256(f"{input_digest}:{mode}:{fingerprint}".encode('ascii')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + RESULT_SUFFIX)
+
+    def get(self, key: str):
+        """Path artefak jika ada di cache (dan tandai baru dipakai), selain itu None."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def new_path(self, suffix: str = PARTIAL_SUFFIX) -> str:
+        """Path file sementara di dalam direktori cache (satu filesystem, jadi put() cukup rename)."""
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix=suffix)
+        os.close(fd)
+        return path
+
+    def put(self, key: str, produced_path: str) -> str:
+        """Pindahkan output yang sudah selesai ke cache, lalu jalankan eviction."""
+        path = self._path(key)
+        os.replace(produced_path, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: str = None):
+        """Hapus artefak LRU sampai total <= max_bytes, serta file sementara yang basi."""
+        now = time.time()
+        results = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith(RESULT_SUFFIX):
+                results.append((st.st_mtime, st.st_size, entry.path))
+            elif entry.name.endswith((PARTIAL_SUFFIX, UPLOAD_SUFFIX)) and now - st.st_mtime > STALE_SECONDS:
+                _remove_quietly(entry.path)
+
+        total = sum(size for _, size, _ in results)
+        for _, size, path in sorted(results):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            _remove_quietly(path)
+            total -= size
+
+def _check_private_dir(directory: str):
+    """Tolak direktori cache milik user lain; perketat mode direktori milik sendiri ke 0700."""
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+        raise ValueError(f"Direktori cache bukan direktori biasa: {directory}")
+    if hasattr(os, 'getuid'):
+        if st.st_uid != os.getuid():
+            raise ValueError(f"Direktori cache {directory} milik user lain (uid {st.st_uid}); "
+                             f"pakai VIDEOHYBRID_CACHE_DIR yang lain.")
+        if st.st_mode & 0o077:
+            os.chmod(directory, 0o700)
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
\ No newline at end of file
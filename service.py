@@ -0,0 +1,468 @@
+# service.py
+"""
+Layanan enkripsi/dekripsi lokal berbasis asyncio (stdlib saja) di atas crypto_hybrid.
+
+Klien mengirim data lewat HTTP (TCP lokal atau Unix socket) dan menerima hasilnya
+secara streaming, tanpa biaya start proses per request:
+
+    POST /encrypt   body = plaintext  -> ciphertext .hybr v2 (header X-Hybr-Key)
+    POST /decrypt   body = .hybr v2   -> plaintext           (header X-Hybr-Key)
+    GET  /stats     penghitung layanan & per job (JSON)
+    GET  /health
+
+AES-GCM berjalan di thread pool (pycryptodome melepas GIL). Batas yang bisa diatur:
+jumlah job bersamaan (sisanya antre, antrean penuh -> 503) dan total byte buffer
+semua job. Setiap job memesan buffer terburuknya dari batas itu sebelum mulai
+(chunk request, buffer segmen codec, potongan output), dan ukuran segmen dipilih
+server, bukan klien: /encrypt memakai segment_size server, /decrypt menolak header
+dengan segmen di atas max_segment_size. Backpressure: chunk berikutnya baru dibaca
+dari klien setelah hasil chunk sebelumnya terkirim (drain), jadi pengunggah/pengunduh
+yang lambat memperlambat job-nya sendiri, bukan memenuhi memori.
+
+Jika error terjadi setelah respons mulai dikirim (mis. tag segmen gagal), koneksi
+diputus tanpa chunk penutup sehingga klien melihat respons tidak lengkap.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from urllib.parse import urlsplit
+from crypto_hybrid import (StreamEncryptor, StreamDecryptor, HybridStats, AES_TAG_LEN, CHUNK, MAX_CHUNK,
+                           MAX_SEGMENT_SIZE, SEGMENT_SIZE)
+
+# ---------- Konstanta ----------
+KEY_HEADER = "x-hybr-key"      # Header berisi keyword Myszkowski
+MAX_HEADER_LINES = 100         # Batas jumlah baris header per request
+STREAM_SLACK = 512 * 1024      # Buffer baca StreamReader + socket asyncio per koneksi (terukur < 0.4 MB)
+REASONS = {100: "Continue", 200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 408: "Request Timeout", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+class _RequestError(Exception):
+    """Request tidak valid sebelum respons dikirim (dijawab dengan status HTTP)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+# ---------- Batas Buffer ----------
+class _ByteBudget:
+    """Total byte buffer yang sedang diproses di semua job; acquire() menunggu jika penuh."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, nbytes: int):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_use + nbytes <= self.limit)
+            self.in_use += nbytes
+
+    async def release(self, nbytes: int):
+        async with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+# ---------- Statistik Job ----------
+class _Job:
+    """
+    Satu request /encrypt atau /decrypt. `stats` (HybridStats) menghitung byte input
+    dan waktu per fase: 'read' menunggu data klien, 'crypt' AES-GCM di pool, 'write'
+    mengirim & drain hasil. Latensi: waktu antre dan waktu sampai byte pertama.
+    """
+
+    def __init__(self, job_id: int, mode: str):
+        self.id = job_id
+        self.mode = mode
+        self.status = "queued"
+        self.error = None
+        self.created = time.perf_counter()
+        self.started = None
+        self.first_byte = None
+        self.bytes_out = 0
+        self.stats = None
+
+    def start(self):
+        self.status = "running"
+        self.started = time.perf_counter()
+        self.stats = HybridStats()
+
+    def as_dict(self) -> dict:
+        info = {"id": self.id, "mode": self.mode, "status": self.status, "error": self.error,
+                "queued": round((self.started or time.perf_counter()) - self.created, 6),
+                "ttfb": round(self.first_byte - self.created, 6) if self.first_byte else None,
+                "bytes_in": 0, "bytes_out": self.bytes_out}
+        if self.stats is not None:
+            stats = self.stats.as_dict()
+            info.update(bytes_in=stats["done_bytes"], elapsed=stats["elapsed"],
+                        throughput=round(self.stats.throughput, 3), phases=stats["phases"])
+        return info
+
+# ---------- HTTP ----------
+async def _read_request(reader, timeout: float):
+    """Baca request line & header. Return (method, path, headers dengan nama huruf kecil)."""
+    line = await asyncio.wait_for(reader.readline(), timeout)
+    if not line:
+        raise ConnectionResetError("Klien menutup koneksi")
+    try:
+        method, target, _ = line.decode('latin-1').split()
+    except ValueError:
+        raise _RequestError(400, "Request line tidak valid")
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await asyncio.wait_for(reader.readline(), timeout)
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, sep, value = line.decode('latin-1').partition(':')
+        if not sep:
+            raise _RequestError(400, "Header tidak valid")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise _RequestError(400, "Terlalu banyak header")
+    return method, urlsplit(target).path, headers
+
+async def _iter_body(reader, headers: dict, chunk_size: int, timeout: float):
+    """Body request per potongan <= chunk_size (Content-Length atau chunked)."""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            try:
+                size = int(line.split(b';')[0].strip(), 16)
+            except ValueError:
+                raise _RequestError(400, "Ukuran chunk tidak valid")
+            if size == 0:
+                while await asyncio.wait_for(reader.readline(), timeout) not in (b'\r\n', b'\n', b''):
+                    pass # Abaikan trailer
+                return
+            while size:
+                data = await asyncio.wait_for(reader.read(min(size, chunk_size)), timeout)
+                if not data:
+                    raise ConnectionResetError("Body terpotong")
+                size -= len(data)
+                yield data
+            await asyncio.wait_for(reader.readline(), timeout) # CRLF setelah data chunk
+        return
+    try:
+        remaining = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise _RequestError(400, "Content-Length tidak valid")
+    while remaining > 0:
+        data = await asyncio.wait_for(reader.read(min(remaining, chunk_size)), timeout)
+        if not data:
+            raise ConnectionResetError("Body terpotong")
+        remaining -= len(data)
+        yield data
+
+def _response_head(status: int, headers: dict) -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+async def _drain(writer, timeout: float):
+    """
+    drain() dengan batas waktu. Klien yang berhenti membaca akan menahan slot dan
+    reservasi buffer job tanpa batas, jadi koneksinya diputus (abort) saat timeout.
+    """
+    try:
+        await asyncio.wait_for(writer.drain(), timeout)
+    except asyncio.TimeoutError:
+        writer.transport.abort()
+        raise ConnectionResetError("Timeout mengirim respons ke klien")
+
+async def _send_json(writer, status: int, obj, timeout: float, extra: dict = None):
+    body = json.dumps(obj).encode('utf-8')
+    headers = {"Content-Type": "application/json", "Content-Length": len(body), "Connection": "close"}
+    headers.update(extra or {})
+    writer.write(_response_head(status, headers) + body)
+    await _drain(writer, timeout)
+
+async def _send_chunk(writer, data, timeout: float):
+    """
+    Kirim satu chunk tanpa menyambungnya ke bytes baru. `data` boleh memoryview ke
+    buffer codec: _process memasang batas buffer tulis 0, jadi drain() baru selesai
+    setelah transport tidak lagi memegang data.
+    """
+    writer.write(b"%x\r\n" % len(data))
+    writer.write(data)
+    writer.write(b"\r\n")
+    await _drain(writer, timeout)
+
+# ---------- Layanan ----------
+class HybrService:
+    """
+    Server HTTP asyncio. `max_jobs` job berjalan bersamaan, paling banyak
+    `max_pending` job menunggu slot, dan total buffer semua job dibatasi
+    `max_buffer` byte (dipesan per job, lihat _reservation). AES-GCM dijalankan
+    di ThreadPoolExecutor (`workers` thread).
+    """
+
+    def __init__(self, max_jobs: int = None, max_pending: int = 100, max_buffer: int = 64 * 1024 * 1024,
+                 chunk_size: int = CHUNK, workers: int = None, segment_size: int = SEGMENT_SIZE,
+                 timeout: float = 60.0, history: int = 100, max_segment_size: int = SEGMENT_SIZE):
+        cores = os.cpu_count() or 1
+        self.max_jobs = max_jobs or cores * 2
+        self.max_pending = max_pending
+        self.chunk_size = chunk_size
+        self.workers = workers or cores
+        self.segment_size = segment_size
+        self.max_segment_size = max(max_segment_size, segment_size)
+        self.timeout = timeout
+        if chunk_size < 1:
+            raise ValueError("chunk_size harus minimal 1 byte")
+        if not 0 < self.max_segment_size <= MAX_SEGMENT_SIZE:
+            raise ValueError(f"Ukuran segmen harus 1..{MAX_SEGMENT_SIZE} byte")
+        for mode in ("encrypt", "decrypt"):
+            if self._reservation(mode) > max_buffer:
+                raise ValueError(f"max_buffer terlalu kecil: satu job {mode} memesan {self._reservation(mode)} byte")
+        self._budget = _ByteBudget(max_buffer)
+        self._slots = asyncio.Semaphore(self.max_jobs)
+        self._waiting = 0
+        self._next_id = 1
+        self._active = {}
+        self._history = deque(maxlen=history)
+        self._totals = {"jobs": 0, "ok": 0, "failed": 0, "rejected": 0, "bytes_in": 0, "bytes_out": 0}
+        self._pool = None
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: str = None):
+        """Jalankan server sampai dibatalkan (Ctrl+C)."""
+        # Import di sini, sama seperti crypto_hybrid: concurrent.futures hanya saat server jalan
+        from concurrent.futures import ThreadPoolExecutor
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            if unix_path:
+                server = await asyncio.start_unix_server(self._handle, path=unix_path)
+            else:
+                server = await asyncio.start_server(self._handle, host, port)
+            where = unix_path or f"http://{host}:{port}"
+            print(f"Listening on {where} (max jobs {self.max_jobs}, buffer {self._budget.limit / (1024 * 1024):g} MB)")
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _reservation(self, mode: str) -> int:
+        """
+        Buffer terburuk satu job, dipesan dari budget selama job berjalan: chunk request,
+        buffer baca asyncio, dan segmen + tag dua kali. Enkripsi menyegel in-place di
+        buffer StreamEncryptor, dan sisa chunk yang belum terkirim disalin ke buffer
+        transport (dikosongkan dulu oleh drain). Dekripsi memegang buffer segmen dan
+        plaintext-nya, ditambah potongan plaintext hasil dekompresi.
+        """
+        base = self.chunk_size + STREAM_SLACK
+        if mode == "encrypt":
+            return base + 2 * (self.segment_size + AES_TAG_LEN)
+        return base + 2 * (self.max_segment_size + AES_TAG_LEN) + MAX_CHUNK
+
+    def snapshot(self) -> dict:
+        """Isi endpoint /stats."""
+        return {
+            "active_jobs": len(self._active),
+            "waiting_jobs": self._waiting,
+            "max_jobs": self.max_jobs,
+            "max_pending": self.max_pending,
+            "buffer_in_use": self._budget.in_use,
+            "buffer_limit": self._budget.limit,
+            "totals": dict(self._totals),
+            "jobs": [job.as_dict() for job in self._active.values()] + [job.as_dict() for job in self._history],
+        }
+
+    async def _handle(self, reader, writer):
+        try:
+            method, path, headers = await _read_request(reader, self.timeout)
+            if path in ("/encrypt", "/decrypt"):
+                if method != "POST":
+                    raise _RequestError(405, "Gunakan POST")
+                await self._run_job(path[1:], headers, reader, writer)
+            elif path in ("/stats", "/health"):
+                if method != "GET":
+                    raise _RequestError(405, "Gunakan GET")
+                await _send_json(writer, 200, self.snapshot() if path == "/stats" else {"status": "ok"},
+                                 self.timeout)
+            else:
+                raise _RequestError(404, f"Endpoint tidak dikenal: {path}")
+        except _RequestError as e:
+            await self._try_send_error(writer, e.status, str(e))
+        except asyncio.TimeoutError:
+            await self._try_send_error(writer, 408, "Timeout menunggu data klien")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass # Klien memutus koneksi
+        except ValueError as e:
+            # Dekripsi gagal setelah respons berjalan (koneksi sudah diputus) atau body tidak valid
+            await self._try_send_error(writer, 400, str(e))
+        except Exception as e:
+            print(f"Error: {type(e).__name__}: {e}", file=sys.stderr)
+            await self._try_send_error(writer, 500, "Kesalahan internal")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _try_send_error(self, writer, status: int, message: str, extra: dict = None):
+        if writer.transport.is_closing():
+            return
+        try:
+            await _send_json(writer, status, {"error": message}, self.timeout, extra)
+        except (ConnectionError, OSError):
+            pass
+
+    async def _run_job(self, mode: str, headers: dict, reader, writer):
+        keyword = headers.get(KEY_HEADER)
+        if not keyword:
+            raise _RequestError(400, f"Header {KEY_HEADER} (keyword Myszkowski) diperlukan")
+        if self._waiting >= self.max_pending:
+            self._totals["rejected"] += 1
+            await self._try_send_error(writer, 503, "Antrean job penuh", {"Retry-After": 1})
+            return
+
+        job = _Job(self._next_id, mode)
+        self._next_id += 1
+        self._totals["jobs"] += 1
+        self._active[job.id] = job
+        try:
+            self._waiting += 1
+            reserved = self._reservation(mode)
+            try:
+                await self._slots.acquire()
+                try:
+                    await self._budget.acquire(reserved)
+                except BaseException:
+                    self._slots.release()
+                    raise
+            finally:
+                self._waiting -= 1
+            try:
+                job.start()
+                await self._process(job, keyword, headers, reader, writer)
+            finally:
+                await self._budget.release(reserved)
+                self._slots.release()
+            job.status = "ok"
+            self._totals["ok"] += 1
+        except BaseException as e:
+            job.status = "failed"
+            job.error = str(e) or type(e).__name__
+            self._totals["failed"] += 1
+            raise
+        finally:
+            if job.stats is not None:
+                job.stats.finish()
+                self._totals["bytes_in"] += job.stats.done_bytes
+            self._totals["bytes_out"] += job.bytes_out
+            del self._active[job.id]
+            self._history.append(job)
+
+    async def _process(self, job: _Job, keyword: str, headers: dict, reader, writer):
+        """Inti satu job: baca chunk -> AES-GCM di pool -> kirim & drain, satu chunk per giliran."""
+        loop = asyncio.get_running_loop()
+        stats = job.stats
+        try:
+            if job.mode == "encrypt":
+                codec = StreamEncryptor(keyword, self.segment_size)
+            else:
+                codec = StreamDecryptor(keyword, self.max_segment_size)
+        except ValueError as e:
+            raise _RequestError(400, str(e))
+        # drain() menunggu sampai buffer transport kosong: tidak ada salinan respons yang
+        # menumpuk di luar reservasi job, dan memoryview dari codec aman dipakai ulang
+        writer.transport.set_write_buffer_limits(0)
+        if headers.get("expect", "").lower() == "100-continue":
+            # Klien baru mengunggah body setelah job mendapat slot
+            writer.write(_response_head(100, {}))
+        started = False
+
+        async def emit(out: bytes):
+            nonlocal started
+            t0 = time.perf_counter()
+            if not started:
+                started = True
+                job.first_byte = t0
+                writer.write(_response_head(200, {"Content-Type": "application/octet-stream",
+                                                  "Transfer-Encoding": "chunked", "Connection": "close"}))
+            await _send_chunk(writer, out, self.timeout)
+            job.bytes_out += len(out)
+            stats.add("write", time.perf_counter() - t0)
+
+        async def crypt(fn, *args):
+            t0 = time.perf_counter()
+            try:
+                return await loop.run_in_executor(self._pool, fn, *args)
+            except ValueError as e:
+                if not started:
+                    raise _RequestError(400, str(e)) # Mis. keyword salah: terdeteksi dari header
+                raise
+            finally:
+                stats.add("crypt", time.perf_counter() - t0)
+
+        async def drain(pieces):
+            # Potongan diambil satu per satu di pool: stream terkompresi yang mengembang
+            # tidak pernah ditampung utuh, dan tiap potongan terkirim sebelum berikutnya dibuat
+            while True:
+                out = await crypt(next, pieces, None)
+                if out is None:
+                    return
+                if out:
+                    await emit(out) # Chunk kosong berarti akhir respons chunked
+
+        body = _iter_body(reader, headers, self.chunk_size, self.timeout)
+        try:
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    chunk = await body.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    stats.add("read", time.perf_counter() - t0)
+                await drain(await crypt(codec.iter_update, chunk))
+                stats.advance(len(chunk))
+            await drain(await crypt(codec.iter_finalize))
+        except BaseException:
+            if started:
+                writer.transport.abort() # Respons sudah berjalan: putus tanpa chunk penutup
+            raise
+        if started:
+            writer.write(b"0\r\n\r\n")
+        else:
+            # Plaintext kosong: tidak ada chunk sama sekali
+            job.first_byte = time.perf_counter()
+            writer.write(_response_head(200, {"Content-Type": "application/octet-stream",
+                                              "Content-Length": 0, "Connection": "close"}))
+        await _drain(writer, self.timeout)
+
+def main():
+    p = argparse.ArgumentParser(description="Local asyncio service for streaming .hybr encryption/decryption")
+    p.add_argument("--host", default="127.0.0.1", help="Listen address (keep it local: the keyword travels in a header)")
+    p.add_argument("--port", type=int, default=8765, help="TCP port")
+    p.add_argument("--unix", default=None, help="Listen on this Unix socket path instead of TCP")
+    p.add_argument("--max-jobs", type=int, default=None, help="Concurrent jobs (default: 2x cores)")
+    p.add_argument("--max-pending", type=int, default=100, help="Jobs allowed to wait for a slot before 503")
+    p.add_argument("--max-buffer-mb", type=int, default=64,
+                   help="Total MB of buffers across jobs; each job reserves chunk + segment buffers before it starts")
+    p.add_argument("--chunk-size", type=int, default=CHUNK, help="Bytes read from a client per step")
+    p.add_argument("--workers", type=int, default=None, help="Crypto thread pool size (default: all cores)")
+    p.add_argument("--segment-size", type=int, default=SEGMENT_SIZE, help="v2 segment size for /encrypt")
+    p.add_argument("--max-segment-size", type=int, default=SEGMENT_SIZE,
+                   help="Largest segment size accepted in /decrypt headers")
+    p.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for client data, and for a client to accept response data")
+    p.add_argument("--history", type=int, default=100, help="Finished jobs kept in /stats")
+    args = p.parse_args()
+
+    async def run():
+        service = HybrService(args.max_jobs, args.max_pending, args.max_buffer_mb * 1024 * 1024,
+                              args.chunk_size, args.workers, args.segment_size, args.timeout, args.history,
+                              args.max_segment_size)
+        await service.serve(args.host, args.port, args.unix)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("Stopped", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
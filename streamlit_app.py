@@ -1,9 +1,12 @@
 # streamlit_app.py — versi final stabil + throughput
 import streamlit as st
+import hashlib
+import html
 import os
 import tempfile
-import time
-from crypto_hybrid import encrypt_file_hybrid, decrypt_file_hybrid
+from crypto_hybrid import encrypt_file_hybrid, decrypt_file_hybrid, add_observer
+from result_cache import ResultCache, UPLOAD_SUFFIX
+from download_server import DownloadServer
 
 # ---------- Konfigurasi dasar ----------
 st.set_page_config(
@@ -12,6 +15,143 @@ st.set_page_config(
     layout="centered"
 )
 
+SPOOL_CHUNK = 1024 * 1024  # Upload disalin ke disk per 1MB
+# Default per user: cache berisi plaintext dan ResultCache menolak direktori milik user lain
+CACHE_DIR = os.environ.get("VIDEOHYBRID_CACHE_DIR", os.path.join(
+    tempfile.gettempdir(), f"videohybrid_cache-{os.getuid()}" if hasattr(os, "getuid") else "videohybrid_cache"))
+CACHE_MAX_BYTES = int(os.environ.get("VIDEOHYBRID_CACHE_MAX_BYTES", 4 * 1024 ** 3))
+# download_button menyimpan seluruh data di memori server; file lebih besar disajikan lewat
+# DownloadServer jika server itu punya URL publik (DOWNLOAD_URL)
+INLINE_DOWNLOAD_LIMIT = int(os.environ.get("VIDEOHYBRID_INLINE_DOWNLOAD_LIMIT", 200 * 1024 ** 2))
+DOWNLOAD_HOST = os.environ.get("VIDEOHYBRID_DOWNLOAD_HOST", "127.0.0.1")
+DOWNLOAD_PORT = int(os.environ.get("VIDEOHYBRID_DOWNLOAD_PORT", 8502))
+DOWNLOAD_URL = os.environ.get("VIDEOHYBRID_DOWNLOAD_URL") # URL publik server download (mis. reverse proxy)
+DOWNLOAD_TTL = 3600  # Link download besar berlaku 1 jam
+
+@st.cache_resource
+def get_result_cache():
+    """Satu ResultCache untuk semua sesi di proses server ini."""
+    return ResultCache(CACHE_DIR, CACHE_MAX_BYTES)
+
+@st.cache_resource
+def get_download_server():
+    """Satu DownloadServer per proses server; None jika port tidak bisa dipakai."""
+    try:
+        return DownloadServer(DOWNLOAD_HOST, DOWNLOAD_PORT, DOWNLOAD_TTL, DOWNLOAD_URL)
+    except OSError:
+        return None
+
+def show_diagnostic(event, info):
+    """Observer crypto_hybrid: tampilkan diagnostik di sesi Streamlit yang sedang menjalankan operasi."""
+    if event == "key_unwrapped" and not info["valid"]:
+        st.warning(f"⚠️ Hasil dekripsi kunci (Myszkowski) bukan hex 64 karakter yang valid "
+                   f"(panjang {info['length']}). Keyword kemungkinan salah.")
+
+@st.cache_resource
+def subscribe_diagnostics():
+    """Daftarkan observer sekali per proses server (bukan setiap rerun)."""
+    add_observer(show_diagnostic)
+    return True
+
+subscribe_diagnostics()
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass # Abaikan jika file sudah tidak ada
+
+def spool_upload(uploaded_file):
+    """
+    Salin upload ke disk per chunk sambil menghitung SHA-256. Hasilnya disimpan di
+    session_state sehingga rerun Streamlit tidak menyalin ulang file yang sama.
+
+    Catatan: UploadedFile adalah io.BytesIO, jadi Streamlit sudah menyimpan seluruh
+    upload di memori sebelum fungsi ini dipanggil. Spool tidak menurunkan puncak
+    memori upload; gunanya agar enkripsi/dekripsi dan cache bekerja dari file.
+    """
+    upload_id = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+    spool = st.session_state.get("spool")
+    if spool and spool["id"] == upload_id and os.path.exists(spool["path"]):
+        return spool
+    if spool:
+        _remove_quietly(spool["path"])
+
+    cache = get_result_cache()
+    path = cache.new_path(UPLOAD_SUFFIX)
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    with open(path, "wb") as tmp:
+        while True:
+            chunk = uploaded_file.read(SPOOL_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            tmp.write(chunk)
+    spool = {"id": upload_id, "path": path, "digest": digest.hexdigest(), "size": os.path.getsize(path)}
+    st.session_state.spool = spool
+    return spool
+
+def drop_spool():
+    """Hapus spool jika file upload sudah dilepas dari uploader."""
+    spool = st.session_state.pop("spool", None)
+    if spool:
+        _remove_quietly(spool["path"])
+
+def offer_download(path, file_name, label):
+    """
+    Tombol download untuk file kecil. File besar lewat link DownloadServer (dibaca per
+    chunk) hanya jika VIDEOHYBRID_DOWNLOAD_URL diisi: tanpa URL publik, port server
+    download tidak terjangkau browser (devcontainer hanya meneruskan 8501, Streamlit
+    Cloud tidak membuka port kedua), jadi dipakai download_button dengan peringatan.
+    """
+    size = os.path.getsize(path)
+    server = get_download_server() if size > INLINE_DOWNLOAD_LIMIT and DOWNLOAD_URL else None
+    if server is None:
+        if size > INLINE_DOWNLOAD_LIMIT:
+            st.warning(f"⚠️ File {size / (1024 * 1024):.0f} MB dikirim lewat tombol download dan dimuat "
+                       f"utuh ke memori server. Isi VIDEOHYBRID_DOWNLOAD_URL agar file besar di-stream "
+                       f"lewat server download.")
+        with open(path, "rb") as f:
+            st.download_button(label, f, file_name=os.path.basename(file_name))
+        return
+    url = server.publish(path, file_name)
+    st.markdown(
+        f'<a href="{html.escape(url)}" download="{html.escape(os.path.basename(file_name))}">{html.escape(label)}</a>',
+        unsafe_allow_html=True,
+    )
+
+def progress_reporter(bar):
+    """Callback progress untuk crypto_hybrid: isi st.progress dengan persen & MB/s yang sedang berjalan."""
+    def report(stats):
+        fraction = stats.fraction or 0.0
+        bar.progress(fraction, text=f"{fraction:.0%} — {stats.done_bytes / (1024 * 1024):.1f} MB "
+                                    f"({stats.throughput:.1f} MB/s)")
+    return report
+
+def run_job(spool, is_encrypt, keyword, progress=None, compression=None):
+    """
+    Jalankan enkripsi/dekripsi, atau ambil artefak yang sudah ada dari cache.
+    Return (path, stats); stats None jika hasil diambil dari cache.
+    """
+    cache = get_result_cache()
+    mode = ("enc" + (f"+{compression}" if compression else "")) if is_encrypt else "dec"
+    key = cache.key(spool["digest"], mode, keyword)
+    cached = cache.get(key)
+    if cached:
+        return cached, None
+    partial = cache.new_path()
+    try:
+        if is_encrypt:
+            stats = encrypt_file_hybrid(spool["path"], partial, keyword, progress=progress,
+                                        compression=compression)
+        else:
+            stats = decrypt_file_hybrid(spool["path"], partial, keyword, progress=progress)
+    except BaseException:
+        _remove_quietly(partial)
+        raise
+    return cache.put(key, partial), stats
+
 st.title("🛡️ VideoHybrid — Enkripsi & Dekripsi File (AES-GCM + Myszkowski)")
 
 st.markdown("""
@@ -45,25 +185,37 @@ else:
     st.warning("⚠️ Keyword belum dimasukkan atau sudah dihapus.")
 
 # ---------- Proses utama ----------
-if uploaded_file: # Gunakan nama variabel baru
-    # Simpan file upload ke temporary file
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        tmp.write(uploaded_file.getbuffer()) # Gunakan nama variabel baru
-        tmp_path = tmp.name
+if not uploaded_file:
+    drop_spool()
+    st.session_state.pop("result", None)
+else:
+    # Simpan file upload ke disk (sekali per upload, bukan setiap rerun)
+    spool = spool_upload(uploaded_file)
+    is_encrypt = mode.startswith("🔒")
 
     # Ukuran file asli (untuk perhitungan throughput)
-    original_file_size_bytes = os.path.getsize(tmp_path)
-    original_file_size_mb = original_file_size_bytes / (1024 * 1024)
+    original_file_size_mb = spool["size"] / (1024 * 1024)
     st.info(f"📦 File: **{uploaded_file.name}** — Ukuran: {original_file_size_mb:.2f} MB") # Gunakan nama variabel baru
 
     # Tentukan nama file output default
-    if mode.startswith("🔒"):
+    if is_encrypt:
         out_name = st.text_input("Nama file output:", value=uploaded_file.name + ".hybr") # Gunakan nama variabel baru
+        compress = st.checkbox("🗜️ Kompres sebelum enkripsi (zlib)",
+                               help="Cocok untuk dokumen & log. Dilewati otomatis untuk file yang "
+                                    "sudah terkompresi (MP4, ZIP, JPG). Dekripsi mendeteksinya sendiri.")
     else:
         guess = uploaded_file.name.replace(".hybr", "") # Gunakan nama variabel baru
         if guess == uploaded_file.name: # Gunakan nama variabel baru
             guess += ".decrypted"
         out_name = st.text_input("Nama file output:", value=guess)
+        compress = False
+
+    # Hasil sebelumnya hanya berlaku untuk upload, mode, kompresi, dan keyword yang sama
+    compression = "zlib" if compress else None
+    job_id = (spool["id"], is_encrypt, compression, st.session_state.keyword)
+    result = st.session_state.get("result")
+    if result and result["job"] != job_id:
+        st.session_state.pop("result", None)
 
     if st.button(f"▶️ Mulai {mode.replace('🔒','Enkripsi').replace('🔓','Dekripsi')}"):
         keyword = st.session_state.keyword
@@ -72,52 +224,29 @@ if uploaded_file: # Gunakan nama variabel baru
         elif not out_name:
              st.error("❌ Harap masukkan nama file output.")
         else:
-            t0 = time.time()
-            progress = st.progress(0)
+            progress = st.progress(0.0)
             try:
-                if mode.startswith("🔒"):
-                    with st.spinner("🔐 Sedang mengenkripsi..."):
-                        encrypt_file_hybrid(tmp_path, out_name, keyword)
-                        # Simulasi progress (opsional, bisa dihapus jika prosesnya cepat)
-                        # for i in range(100):
-                        #     time.sleep(0.01)
-                        #     progress.progress(i + 1)
-                        progress.progress(100) # Langsung set 100% setelah selesai
-
-                    elapsed = time.time() - t0
-                    # Hitung throughput berdasarkan ukuran file ASLI
-                    throughput = original_file_size_mb / elapsed if elapsed > 0 else 0
-                    st.success(f"✅ Enkripsi selesai dalam {elapsed:.2f} detik (Throughput: {throughput:.2f} MB/s)")
-
-                    with open(out_name, "rb") as f:
-                        st.download_button(
-                            "⬇️ Download File Terenkripsi (.hybr)",
-                            f, file_name=os.path.basename(out_name)
-                        )
-                else: # Mode Dekripsi
-                    with st.spinner("🔓 Sedang mendekripsi..."):
-                        decrypt_file_hybrid(tmp_path, out_name, keyword)
-                        # Simulasi progress (opsional)
-                        # for i in range(100):
-                        #     time.sleep(0.01)
-                        #     progress.progress(i + 1)
-                        progress.progress(100) # Langsung set 100%
-
-                    elapsed = time.time() - t0
-                    # Hitung throughput berdasarkan ukuran file ASLI (tmp_path) sebelum didekripsi
-                    throughput = original_file_size_mb / elapsed if elapsed > 0 else 0
-                    st.success(f"✅ Dekripsi selesai dalam {elapsed:.2f} detik (Throughput: {throughput:.2f} MB/s)")
-
-                    with open(out_name, "rb") as f:
-                        st.download_button(
-                            "⬇️ Download File Asli",
-                            f, file_name=os.path.basename(out_name)
-                        )
+                with st.spinner("🔐 Sedang mengenkripsi..." if is_encrypt else "🔓 Sedang mendekripsi..."):
+                    result_path, stats = run_job(spool, is_encrypt, keyword, progress_reporter(progress),
+                                                 compression)
+                    progress.progress(1.0)
+
+                action = "Enkripsi" if is_encrypt else "Dekripsi"
+                if stats is None:
+                    message = f"♻️ {action} diambil dari cache (hasil sebelumnya untuk file & keyword yang sama)."
+                else:
+                    # Throughput dihitung dari byte plaintext yang diproses
+                    message = (f"✅ {action} selesai dalam {stats.elapsed:.2f} detik "
+                               f"(Throughput: {stats.throughput:.2f} MB/s)")
+                    phases = ", ".join(f"{name} {sec:.2f}s" for name, sec in stats.phases.items() if sec)
+                    if phases:
+                        message += f"\n\n⏱️ Rincian waktu: {phases}"
+                st.session_state.result = {"job": job_id, "path": result_path, "message": message}
 
             except ValueError as e:
                 msg = str(e).lower()
                 # Pesan error lebih spesifik
-                if "key hex tidak valid" in msg:
+                if "key hex tidak valid" in msg or "key check value" in msg:
                     st.error("❌ Keyword Myszkowski salah atau file .hybr korup.\nPastikan keyword sama persis.")
                 elif "mac check failed" in msg or "integritas data terganggu" in msg:
                     st.error("⚠️ File terenkripsi tidak valid atau telah dimodifikasi (Tag GCM gagal).")
@@ -129,12 +258,13 @@ if uploaded_file: # Gunakan nama variabel baru
                     st.error(f"❌ Terjadi kesalahan Value: {e}")
             except Exception as e:
                 st.error(f"❌ Error tak terduga: {e}")
-            finally:
-                # Selalu bersihkan file sementara
-                try:
-                    os.remove(tmp_path)
-                except OSError:
-                    pass # Abaikan jika file sudah tidak ada
+
+    # ---------- Download (tetap tampil saat rerun, tanpa memproses ulang) ----------
+    result = st.session_state.get("result")
+    if result and os.path.exists(result["path"]):
+        st.success(result["message"])
+        label = "⬇️ Download File Terenkripsi (.hybr)" if is_encrypt else "⬇️ Download File Asli"
+        offer_download(result["path"], out_name or os.path.basename(result["path"]), label)
 
 # ---------- Tombol Reset Session ----------
 st.divider()
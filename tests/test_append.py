@@ -0,0 +1,155 @@
+# tests/test_append.py
+"""append_file_hybrid: append bertahap, transisi segmen terakhir, dan pemulihan via journal."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crypto_hybrid as ch  # noqa: E402
+
+KEYWORD = "Videohybrid"
+SEGMENT = 4096
+
+class _Crash(Exception):
+    pass
+
+class Recording:
+    """File input yang terus bertambah beserta file .hybr appendable-nya."""
+
+    def __init__(self, tmp_path):
+        self.src = str(tmp_path / "rec.bin")
+        self.out = str(tmp_path / "rec.hybr")
+        self.journal = self.out + ch.APPEND_JOURNAL_SUFFIX
+        self.decrypted = str(tmp_path / "rec.dec")
+        self.data = b""
+        open(self.src, "wb").close()
+
+    def grow(self, size: int):
+        chunk = os.urandom(size)
+        self.data += chunk
+        with open(self.src, "ab") as f:
+            f.write(chunk)
+
+    def rewrite(self, data: bytes):
+        with open(self.src, "wb") as f:
+            f.write(data)
+
+    def append(self):
+        return ch.append_file_hybrid(self.src, self.out, KEYWORD, segment_size=SEGMENT)
+
+    def crashed_append(self, monkeypatch):
+        """Append yang terputus setelah sebagian segmen baru ditulis (journal tertinggal)."""
+        def crash(fin, fout, *args):
+            fout.write(b"\xaa" * (SEGMENT // 2))
+            fout.flush()
+            raise _Crash()
+        with monkeypatch.context() as m:
+            m.setattr(ch, "_seal_appended", crash)
+            with pytest.raises(_Crash):
+                self.append()
+        assert os.path.exists(self.journal)
+
+    def decrypt(self) -> bytes:
+        ch.decrypt_file_hybrid(self.out, self.decrypted, KEYWORD)
+        with open(self.decrypted, "rb") as f:
+            return f.read()
+
+@pytest.fixture
+def rec(tmp_path):
+    return Recording(tmp_path)
+
+def test_incremental_appends(rec):
+    for size in (10, SEGMENT, 3 * SEGMENT + 7, 1, 0):
+        rec.grow(size)
+        rec.append()
+        assert rec.decrypt() == rec.data
+        assert not os.path.exists(rec.journal)
+    info = ch.inspect_file(rec.out)
+    assert info["appendable"]
+
+def test_full_last_segment_becomes_non_last(rec):
+    # Segmen terakhir yang penuh disegel dengan penanda 'last'; append berikutnya menulisnya ulang sebagai segmen biasa
+    rec.grow(2 * SEGMENT)
+    rec.append()
+    assert rec.decrypt() == rec.data
+    rec.grow(SEGMENT)
+    rec.append()
+    assert rec.decrypt() == rec.data
+    with open(rec.out, "rb") as f:
+        header = ch._read_header(f)
+    assert os.path.getsize(rec.out) == header.header_size + 3 * (SEGMENT + ch.AES_TAG_LEN)
+    rec.grow(5)
+    rec.append()
+    assert rec.decrypt() == rec.data
+
+def test_rejects_input_that_is_not_a_continuation(rec):
+    rec.grow(SEGMENT + 100)
+    rec.append()
+    tampered = bytearray(rec.data)
+    tampered[SEGMENT + 50] ^= 0x01
+    rec.rewrite(bytes(tampered) + b"more")
+    with pytest.raises(ValueError):
+        rec.append()
+    rec.rewrite(rec.data[:SEGMENT])
+    with pytest.raises(ValueError):
+        rec.append()
+
+@pytest.mark.parametrize("grow_after", [0, 500, 2 * SEGMENT])
+def test_journal_replay(rec, monkeypatch, grow_after):
+    rec.grow(SEGMENT + 100)
+    rec.append()
+    rec.grow(3000)
+    rec.crashed_append(monkeypatch)
+    with pytest.raises(ValueError):
+        rec.decrypt() # Segmen terakhir rusak sampai pemulihan
+    rec.grow(grow_after)
+    rec.append()
+    assert not os.path.exists(rec.journal)
+    assert rec.decrypt() == rec.data
+
+def test_replay_refuses_changed_input(rec, monkeypatch):
+    rec.grow(2 * SEGMENT + 100)
+    rec.append()
+    rec.grow(2000)
+    rec.crashed_append(monkeypatch)
+    index = ch._read_journal(rec.journal)[0]
+    original = rec.data
+
+    # Perubahan di rentang yang dicatat journal (segmen yang sedang ditimpa)
+    changed = bytearray(original)
+    changed[index * SEGMENT + 5] ^= 0x01
+    rec.rewrite(bytes(changed))
+    with pytest.raises(ValueError, match="berubah"):
+        rec.append()
+    assert os.path.exists(rec.journal)
+
+    # Perubahan di segmen penuh sebelum indeks journal
+    changed = bytearray(original)
+    changed[(index - 1) * SEGMENT + 5] ^= 0x01
+    rec.rewrite(bytes(changed))
+    with pytest.raises(ValueError):
+        rec.append()
+
+    # Input menyusut di bawah ukuran yang dicatat journal
+    rec.rewrite(original[:index * SEGMENT + 10])
+    with pytest.raises(ValueError):
+        rec.append()
+    assert os.path.exists(rec.journal)
+
+    # Input semula dikembalikan: pemulihan berhasil
+    rec.rewrite(original)
+    rec.append()
+    assert not os.path.exists(rec.journal)
+    assert rec.decrypt() == original
+
+def test_stale_journal_without_output(rec, monkeypatch):
+    rec.grow(100)
+    rec.append()
+    rec.grow(100)
+    rec.crashed_append(monkeypatch)
+    os.remove(rec.out)
+    rec.append()
+    assert not os.path.exists(rec.journal)
+    assert rec.decrypt() == rec.data
@@ -0,0 +1,213 @@
+# tests/test_format.py
+"""Format .hybr: round trip semua engine, kompatibilitas file lama, dan deteksi manipulasi."""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crypto_hybrid as ch  # noqa: E402
+
+KEYWORD = "Videohybrid"
+SEGMENT = 4096
+
+# Ditulis oleh encrypt_file_hybrid versi awal (sebelum format v2) untuk 100 byte ((i*7+3) % 256)
+BASELINE_V1 = bytes.fromhex(
+    "48594252010040366535323138373261373730333034613138396536663139613433343538313066656435666335363863"
+    "633232333733643032353565383033373563623936330cc1190cb8c30c92fcd431f11a07f6c60d43d496216619e400a108"
+    "ea6ff31ec8547caa21ba043e6bbc8a6f9a2a8157ea24151f98fb026346c9e7ef11b9e4b7eca7a6a35e9b241a58a5bfa045"
+    "b52f81d1ba0b432b4803892915915f88ded6ebf0249e9247a9a54d33bfc160c4a8441c8b05d6edf6bd8abc4fc31d2c138d"
+    "3be631e5")
+# v2 dengan KCV, segmen 64 byte, 150 byte ((i*11+5) % 256): mengunci turunan nonce, AAD, dan layout
+FIXED_V2 = bytes.fromhex(
+    "48594252020040336463346363666332323535663133343432303365623832646139353638326564613736616232666231"
+    "303439396538386662653863616461303361633937390c619612450525e56492eaae4f0000004001d1c497ba970786e4fb"
+    "5e22d4597231537a9dd276bdf7e610c67471991ee4eef56814a702f1c4a1560c88d934df17434b686b427798c755fcc6e7"
+    "982acf0bf3b6b8de0e6de0b58829789a91995ca59b4fe16c57921f58af23e1204660b005d6adb9bbb0eb773e51498e8021"
+    "4af25e1497ea947f44511aa37cdb9e85179d44d49172a45700158c2059b014b5cc99400fa31dbc3c3c5737606aef699d66"
+    "dcb1f9c777fc9e7fbf0b0253666aac221acef3d2f459b71e4c843a3c7ae8d1ea7314f1b2183154858df9a749bef91c471b"
+    "89b6ce310f82c60fb4")
+
+# (version, backend, workers, executor)
+ENGINES = [
+    (ch.VERSION_V2, "buffered", 1, "thread"),
+    (ch.VERSION_V2, "buffered", 4, "thread"),
+    (ch.VERSION_V2, "buffered", 2, "process"),
+    (ch.VERSION_V2, "mmap", 4, "thread"),
+    (ch.VERSION_V2, "pipelined", 1, "thread"),
+    (ch.VERSION_V1, "buffered", 1, "thread"),
+    (ch.VERSION_V1, "mmap", 1, "thread"),
+    (ch.VERSION_V1, "pipelined", 1, "thread"),
+]
+SIZES = [0, 1, SEGMENT - 1, SEGMENT, SEGMENT + 1, 3 * SEGMENT + 5]
+
+def _payload(size: int) -> bytes:
+    return os.urandom(size)
+
+def _write(path, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+def _read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def _encrypt(tmp_path, data: bytes, **kwargs):
+    src, enc = tmp_path / "plain", tmp_path / "plain.hybr"
+    _write(src, data)
+    ch.encrypt_file_hybrid(str(src), str(enc), KEYWORD, **kwargs)
+    return enc
+
+def _decrypt(tmp_path, blob: bytes, **kwargs) -> bytes:
+    enc, out = tmp_path / "in.hybr", tmp_path / "out"
+    _write(enc, blob)
+    try:
+        ch.decrypt_file_hybrid(str(enc), str(out), KEYWORD, **kwargs)
+    except ValueError:
+        assert not out.exists(), "output parsial tidak boleh tertinggal"
+        raise
+    return _read(out)
+
+# ---------- Round trip ----------
+@pytest.mark.parametrize("version,backend,workers,executor", ENGINES)
+@pytest.mark.parametrize("size", SIZES)
+def test_round_trip(tmp_path, version, backend, workers, executor, size):
+    data = _payload(size)
+    enc = _encrypt(tmp_path, data, version=version, segment_size=SEGMENT, workers=workers,
+                   executor=executor, backend=backend)
+    out = tmp_path / "out"
+    ch.decrypt_file_hybrid(str(enc), str(out), KEYWORD, workers=workers, executor=executor, backend=backend)
+    assert _read(out) == data
+    ch.verify_file(str(enc), KEYWORD)
+
+def test_round_trip_default_segment(tmp_path):
+    data = _payload(3 * ch.SEGMENT_SIZE + 5)
+    enc = _encrypt(tmp_path, data)
+    assert _decrypt(tmp_path, _read(enc)) == data
+
+@pytest.mark.parametrize("size", [0, 1, SEGMENT, 3 * SEGMENT + 5])
+def test_stream_round_trip(tmp_path, size):
+    data = _payload(size)
+    sealed = io.BytesIO()
+    ch.encrypt_stream(io.BytesIO(data), sealed, KEYWORD, segment_size=SEGMENT)
+    out = io.BytesIO()
+    ch.decrypt_stream(io.BytesIO(sealed.getvalue()), out, KEYWORD)
+    assert out.getvalue() == data
+    # Generator push-style menghasilkan byte yang bisa dibaca engine file, dan sebaliknya
+    pieces = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+    blob = b"".join(ch.iter_encrypt(pieces, KEYWORD, segment_size=SEGMENT))
+    assert _decrypt(tmp_path, blob) == data
+    assert b"".join(ch.iter_decrypt([sealed.getvalue()], KEYWORD)) == data
+
+def test_stream_encryptor_iterators(tmp_path):
+    # Potongan iter_update adalah memoryview ke buffer yang dipakai ulang: salin sebelum lanjut
+    data = _payload(5 * SEGMENT + 3)
+    encryptor = ch.StreamEncryptor(KEYWORD, SEGMENT)
+    out = bytearray()
+    for i in range(0, len(data), 3000):
+        for piece in encryptor.iter_update(data[i:i + 3000]):
+            out += piece
+    for piece in encryptor.iter_finalize():
+        out += piece
+    assert _decrypt(tmp_path, bytes(out)) == data
+    encryptor = ch.StreamEncryptor(KEYWORD, SEGMENT)
+    next(encryptor.iter_update(data))
+    with pytest.raises(ValueError):
+        encryptor.iter_update(data)
+
+# ---------- Kompatibilitas ----------
+def test_baseline_v1_file(tmp_path):
+    expected = bytes((i * 7 + 3) % 256 for i in range(100))
+    assert _decrypt(tmp_path, BASELINE_V1) == expected
+    assert _decrypt(tmp_path, BASELINE_V1, backend="mmap") == expected
+
+def test_fixed_v2_file(tmp_path):
+    expected = bytes((i * 11 + 5) % 256 for i in range(150))
+    for backend in ch.BACKENDS:
+        assert _decrypt(tmp_path, FIXED_V2, backend=backend) == expected
+    # Rentang melintasi batas segmen 64 byte
+    assert ch.decrypt_range(str(tmp_path / "in.hybr"), KEYWORD, 60, 10) == expected[60:70]
+
+def test_segment_nonce():
+    base = bytes(range(12))
+    nonces = {ch._segment_nonce(base, i, last) for i in range(64) for last in (False, True)}
+    assert len(nonces) == 128
+    assert ch._segment_nonce(base, 0, False) == base
+    assert ch._segment_nonce(base, 0, True) == base[:11] + bytes([base[11] ^ 1])
+    assert ch._segment_nonce(base, 3, False) == base[:11] + bytes([base[11] ^ 6])
+    # File appendable: panjang segmen terakhir di-XOR ke 4 byte pertama
+    assert ch._segment_nonce(base, 0, True, 5) == bytes([0, 1, 2, 3 ^ 5]) + base[4:11] + bytes([base[11] ^ 1])
+    assert ch._segment_nonce(base, 0, False, 5) == base
+
+# ---------- Manipulasi & pemotongan ----------
+def _v2_file(tmp_path, segments: int = 3, tail: int = 5):
+    data = _payload(segments * SEGMENT + tail)
+    blob = _read(_encrypt(tmp_path, data, segment_size=SEGMENT))
+    header = ch._read_header(io.BytesIO(blob))
+    return data, blob, header
+
+@pytest.mark.parametrize("backend", ch.BACKENDS)
+def test_truncated_at_segment_boundary(tmp_path, backend):
+    _, blob, header = _v2_file(tmp_path, tail=0)
+    full = SEGMENT + ch.AES_TAG_LEN
+    # Buang segmen terakhir: segmen sebelumnya tidak bertanda 'last', jadi harus ditolak
+    with pytest.raises(ValueError):
+        _decrypt(tmp_path, blob[:header.header_size + 2 * full], backend=backend)
+
+@pytest.mark.parametrize("cut", [1, ch.AES_TAG_LEN, ch.AES_TAG_LEN + 1])
+def test_truncated_inside_segment(tmp_path, cut):
+    _, blob, _ = _v2_file(tmp_path)
+    with pytest.raises(ValueError):
+        _decrypt(tmp_path, blob[:-cut])
+
+@pytest.mark.parametrize("backend", ch.BACKENDS)
+def test_swapped_segments(tmp_path, backend):
+    _, blob, header = _v2_file(tmp_path)
+    full = SEGMENT + ch.AES_TAG_LEN
+    start = header.header_size
+    first, second = blob[start:start + full], blob[start + full:start + 2 * full]
+    swapped = blob[:start] + second + first + blob[start + 2 * full:]
+    with pytest.raises(ValueError):
+        _decrypt(tmp_path, swapped, backend=backend)
+
+@pytest.mark.parametrize("offset", [0, SEGMENT - 1, SEGMENT + 3, -1])
+def test_flipped_payload_byte(tmp_path, offset):
+    _, blob, header = _v2_file(tmp_path)
+    pos = header.header_size + offset if offset >= 0 else len(blob) + offset
+    tampered = bytearray(blob)
+    tampered[pos] ^= 0x01
+    with pytest.raises(ValueError):
+        _decrypt(tmp_path, bytes(tampered))
+    with pytest.raises(ValueError):
+        b"".join(ch.iter_decrypt([bytes(tampered)], KEYWORD))
+
+def test_flags_are_authenticated(tmp_path):
+    # Ganti flags dan hitung ulang KCV-nya: hanya AAD segmen yang bisa menolak file ini
+    _, blob, header = _v2_file(tmp_path)
+    aes_key = ch._header_key(header, KEYWORD)
+    flags = header.flags | ch.FLAG_APPEND
+    key_check = ch._key_check(aes_key, header.version, header.key_cipher_bytes, header.nonce,
+                              header.segment_size, flags)
+    forged = ch._build_header(header.version, header.key_cipher_bytes, header.nonce,
+                              header.segment_size, flags, key_check)
+    assert len(forged) == header.header_size
+    with pytest.raises(ValueError):
+        _decrypt(tmp_path, forged + blob[header.header_size:])
+
+def test_v1_tampered_and_truncated(tmp_path):
+    tampered = bytearray(BASELINE_V1)
+    tampered[-20] ^= 0x01
+    with pytest.raises(ValueError):
+        _decrypt(tmp_path, bytes(tampered))
+    with pytest.raises(ValueError):
+        _decrypt(tmp_path, BASELINE_V1[:-1])
+
+def test_wrong_keyword(tmp_path):
+    _, blob, _ = _v2_file(tmp_path)
+    enc, out = tmp_path / "in.hybr", tmp_path / "out"
+    _write(enc, blob)
+    with pytest.raises(ValueError):
+        ch.decrypt_file_hybrid(str(enc), str(out), KEYWORD + "x")
+    assert not out.exists()
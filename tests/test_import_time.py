@@ -0,0 +1,23 @@
+# tests/test_import_time.py
+"""Target waktu import: modul inti dan CLI harus cepat dan tidak meng-import Streamlit."""
+import compileall
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bench  # noqa: E402
+
+@pytest.mark.parametrize("module", bench.IMPORT_MODULES)
+def test_import_time(module):
+    compileall.compile_file(os.path.join(ROOT, module + ".py"), quiet=1)
+    # Ambil sampel tercepat dari tiga run agar tidak flaky karena beban mesin sesaat
+    samples = [bench.import_time(module) for _ in range(3)]
+    seconds = min(s for s, _ in samples)
+    ui_modules = {m for _, ui in samples for m in ui}
+    assert not ui_modules, f"{module} imports UI module(s): {', '.join(sorted(ui_modules))}"
+    assert seconds * 1000 <= bench.IMPORT_TARGET_MS, \
+        f"{module}: {seconds * 1000:.1f} ms > {bench.IMPORT_TARGET_MS} ms"
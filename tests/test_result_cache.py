@@ -0,0 +1,41 @@
+# tests/test_result_cache.py
+"""Izin direktori cache dan secret ResultCache (cache berisi plaintext hasil dekripsi)."""
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_cache import ResultCache  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "getuid"), reason="izin POSIX")
+
+def _mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def test_private_directory_and_secret(tmp_path):
+    directory = tmp_path / "cache"
+    ResultCache(str(directory), 1024)
+    assert _mode(directory) == 0o700
+    assert _mode(directory / ".secret") == 0o600
+
+def test_tightens_own_directory_and_replaces_exposed_secret(tmp_path):
+    directory = tmp_path / "cache"
+    directory.mkdir(mode=0o755)
+    os.chmod(directory, 0o755)
+    (directory / ".secret").write_bytes(b"x" * 32)
+    os.chmod(directory / ".secret", 0o644)
+    cache = ResultCache(str(directory), 1024)
+    assert _mode(directory) == 0o700
+    assert _mode(directory / ".secret") == 0o600
+    assert cache._secret != b"x" * 32
+
+@pytest.mark.skipif(hasattr(os, "getuid") and os.getuid() != 0, reason="butuh root untuk chown")
+def test_refuses_foreign_directory(tmp_path):
+    directory = tmp_path / "cache"
+    directory.mkdir()
+    os.chown(directory, 12345, 12345)
+    with pytest.raises(ValueError):
+        ResultCache(str(directory), 1024)